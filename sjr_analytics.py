@@ -1,117 +1,666 @@
+# Imported first: its clock is the startup reference for mark()
+from sjr_trace import span, get_tracer, mark, print_milestones
 import pandas as pd
 import re
-from sjr_scraper import search_journal, get_journal_metrics, download_journal_rankings
+import asyncio
+from sjr_scraper import SJRScraper, AsyncSJRScraper
+from sjr_cache import get_default_cache, source_id
+from sjr_index import get_ranking_index, clean_issn, prepare_ranking_table
+from sjr_store import open_default_store
+from sjr_search import add_to_default_index
+from sjr_export import compact_stats
 
-def get_journal_percentiles(journal_name, year="2022"):
+mark("imports")
+
+async def get_journal_percentiles_async(journal_name, year="2022", scraper=None, use_cache=True, concurrency=1,
+                                        refresh=False):
     """
     Calculates the percentile of a journal in all its subject areas and categories.
+    Pass a shared AsyncSJRScraper to run many journals concurrently on one browser.
+    If a complete snapshot of the year exists (and use_cache is on), it is answered
+    from there without a browser.
     """
+    if use_cache:
+        snapshot_results = await asyncio.to_thread(percentiles_from_snapshot, journal_name, year)
+        if snapshot_results:
+            print(f"Answered from the local {year} snapshot.")
+            return snapshot_results
+
+    if scraper is None:
+        async with AsyncSJRScraper() as own_scraper:
+            return await get_journal_percentiles_async(journal_name, year, scraper=own_scraper,
+                                                       use_cache=use_cache, concurrency=concurrency,
+                                                       refresh=refresh)
+
     # 1. Search
     print(f"Searching for '{journal_name}'...")
-    results = search_journal(journal_name)
+    results = await scraper.search_journal(journal_name)
     if not results:
         print("Journal not found.")
         return None
-    
+
     # Assume first result is the target
     target_journal = results[0]
     print(f"Found: {target_journal['title']}")
-    
+
     # 2. Get Metrics (Categories & ISSN)
     print(f"Extracting metrics from {target_journal['url']}...")
-    metrics = get_journal_metrics(target_journal['url'])
+    metrics = await scraper.get_journal_metrics(target_journal['url'], refresh=refresh)
+
+    return await calculate_percentiles_from_metrics_async(target_journal['title'], metrics, year, scraper=scraper,
+                                                          use_cache=use_cache, concurrency=concurrency)
+
+def get_journal_percentiles(journal_name, year="2022", use_cache=True, concurrency=1, refresh=False,
+                            scraper_options=None):
+    """
+    Calculates the percentile of a journal in all its subject areas and categories.
+    scraper_options are passed to the SJRScraper opened for this call.
+    """
+    # One browser session for search, metrics and every ranking download
+    with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as scraper:
+        return scraper.run(get_journal_percentiles_async(journal_name, year, scraper=scraper.async_scraper,
+                                                         use_cache=use_cache, concurrency=concurrency,
+                                                         refresh=refresh))
+
+async def _load_rankings(scraper, cache, year, type_str, cat_id):
+    """
+    Returns the ranking table from the local snapshot or the cache, downloading it only on a miss.
+    Every table comes back in the compact schema with its per-row percentile columns precomputed.
+    """
+    store = open_default_store()
+    if store is not None:
+        async with span("store.get"):
+            df = await asyncio.to_thread(store.get, year, type_str, cat_id)
+        if df is not None:
+            return prepare_ranking_table(df)
+    if cache is not None:
+        async with span("cache.get"):
+            df = await asyncio.to_thread(cache.get, year, type_str, cat_id)
+        if df is not None:
+            return prepare_ranking_table(df)
+    df = await scraper.download_journal_rankings(year, cat_id, type_str)
+    if df is None:
+        return None
+    with span("prepare"):
+        df = prepare_ranking_table(df)
+    add_to_default_index(df)
+    if cache is not None:
+        try:
+            async with span("cache.put"):
+                await asyncio.to_thread(cache.put, year, type_str, cat_id, df)
+        except Exception as e:
+            print(f"Error caching ranking table: {e}")
+    return df
+
+def _result_row(cat, match_row):
+    """
+    Builds a result dict from a row of a table prepared by prepare_ranking_table.
+    Compact dtypes are turned back into plain Python values.
+    """
+    sjr = match_row.get('SJR')
+    quartile = match_row.get('SJR Best Quartile')
+    return {
+        "Category": cat['name'],
+        "Type": cat['type'],
+        "Rank": int(match_row['Rank']) if pd.notna(match_row['Rank']) else None,
+        "Total Journals": int(match_row['Total Journals']),
+        "Percentile": round(float(match_row['Percentile']), 2),
+        "SJR": round(float(sjr), 3) if pd.notna(sjr) else 'N/A',
+        "Quartile": str(quartile) if pd.notna(quartile) else 'N/A'
+    }
+
+def _percentile_from_table(cat, df, journal_title, issns):
+    """
+    Finds the journal in one ranking table and computes its percentile there.
+    Returns the result dict, or None if the journal is not listed.
+    """
+    # Match Logic (ISSN first, then title) via the table's prebuilt index
+    index = get_ranking_index(df)
+    match_row = None
+
+    pos = index.find_by_issn(issns) if issns else None
+    if pos is None:
+        print("ISSN match failed/skipped. Trying Title match...")
+        pos = index.find_by_title(journal_title)
+    if pos is not None:
+        match_row = df.iloc[pos]
     
-    return calculate_percentiles_from_metrics(target_journal['title'], metrics, year)
+    if match_row is None:
+        print(f"  -> Journal not found in ranking list for {cat['name']}")
+        return None
+
+    result = _result_row(cat, match_row)
+    print(f"  -> Rank: {result['Rank']}/{result['Total Journals']}, Percentile: {result['Percentile']}%")
+    return result
 
-def calculate_percentiles_from_metrics(journal_title, metrics, year="2022"):
+def percentiles_from_snapshot(journal, year, store=None):
+    """
+    Answers a percentile query entirely from a complete local snapshot (see sjr_store).
+    journal may be a title, an ISSN or a Scimago journal URL; every stored table listing
+    it yields one result.
+    The journal is looked up in the store's journal key table, so only the tables
+    listing it are read. Returns None if there is no complete snapshot for the year.
+    """
+    store = store or open_default_store()
+    if store is None or not store.is_complete(year):
+        return None
+
+    query = str(journal).strip()
+    issn = clean_issn(query)
+    issns = [issn] if len(issn) == 8 and issn[:7].isdigit() else []
+
+    sid = source_id(query)
+    matches = store.find_journal(year, issns, None if issns or sid else query, sid=sid)
+    if not matches:
+        return []
+
+    results = []
+    for cat in store.tables(year):
+        type_str = 'area' if cat['type'] == 'Subject Area' else 'category'
+        pos = matches.get((type_str, cat['id']))
+        if pos is None:
+            continue
+        df = store.get(year, type_str, cat['id'])
+        if df is None or pos >= len(df):
+            continue
+        df = prepare_ranking_table(df)
+        results.append(_result_row(cat, df.iloc[pos]))
+    return results
+
+def _resolve_cache(cache, use_cache):
+    """
+    The ranking cache to use: cache if given, else the default one; None with use_cache off.
+    """
+    if not use_cache:
+        return None
+    return cache if cache is not None else get_default_cache()
+
+# Status of a streamed category record
+STATUS_OK = "ok"
+STATUS_NOT_LISTED = "not_listed"
+STATUS_DOWNLOAD_FAILED = "download_failed"
+STATUS_ERROR = "error"
+
+def _failure_record(cat, status, error):
+    return {"Category": cat['name'], "Type": cat['type'], "Status": status, "Error": error}
+
+async def _category_record(scraper, cache, year, cat, journal_title, issns):
+    """
+    Loads one category's ranking table and computes the journal's percentile in it.
+    Never raises: returns the result dict with Status 'ok', or a failure record
+    (Category, Type, Status, Error) saying why there is no result.
+    """
+    cat_name = cat['name']
+    cat_type = cat['type'] 
+    cat_id = cat['id']
+    type_str = 'area' if cat_type == 'Subject Area' else 'category'
+    
+    print(f"\nProcessing {cat_type}: {cat_name} (ID: {cat_id})...")
+    
+    try:
+        async with span("category", name=cat_name, year=str(year)):
+            df = await _load_rankings(scraper, cache, year, type_str, cat_id)
+            if df is None:
+                print(f"Failed to download data for {cat_name}")
+                return _failure_record(cat, STATUS_DOWNLOAD_FAILED, "ranking table could not be downloaded")
+            with span("match"):
+                result = _percentile_from_table(cat, df, journal_title, issns)
+            if result is None:
+                return _failure_record(cat, STATUS_NOT_LISTED, "journal not listed in this ranking table")
+            return {**result, "Status": STATUS_OK}
+    except Exception as e:
+        print(f"Error processing {cat_name}: {e}")
+        return _failure_record(cat, STATUS_ERROR, str(e))
+
+async def _process_category(scraper, cache, year, cat, journal_title, issns):
+    """
+    Like _category_record, but returns only the result dict, or None on any failure.
+    """
+    record = await _category_record(scraper, cache, year, cat, journal_title, issns)
+    if record["Status"] != STATUS_OK:
+        return None
+    return {k: v for k, v in record.items() if k != "Status"}
+
+async def calculate_percentiles_from_metrics_async(journal_title, metrics, year="2022", scraper=None, cache=None,
+                                                   use_cache=True, concurrency=1):
     """
     Calculates percentiles given already extracted metrics (categories, ISSNs).
+    Up to `concurrency` categories are fetched at once, each in its own page of the
+    shared browser. Results keep the original category order, and one failing
+    category does not affect the others.
+    """
+    results = {}
+    stream = _iter_category_records(journal_title, metrics, year, scraper, cache, use_cache, concurrency)
+    try:
+        async for pos, record in stream:
+            if record["Status"] == STATUS_OK:
+                results[pos] = {k: v for k, v in record.items() if k != "Status"}
+    finally:
+        await stream.aclose()
+    return [results[pos] for pos in sorted(results)]
+
+def calculate_percentiles_from_metrics(journal_title, metrics, year="2022", scraper=None, cache=None, use_cache=True,
+                                       concurrency=1, scraper_options=None):
+    """
+    Calculates percentiles given already extracted metrics (categories, ISSNs).
+    Pass an open SJRScraper to reuse its browser; otherwise one is opened for this call.
+    Ranking tables come from the on-disk RankingCache and are only downloaded on a miss.
+    With concurrency > 1, up to that many categories are downloaded in parallel.
+    """
+    if scraper is None:
+        with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as own_scraper:
+            return calculate_percentiles_from_metrics(journal_title, metrics, year, scraper=own_scraper,
+                                                      cache=cache, use_cache=use_cache, concurrency=concurrency)
+
+    return scraper.run(calculate_percentiles_from_metrics_async(journal_title, metrics, year,
+                                                                scraper=scraper.async_scraper, cache=cache,
+                                                                use_cache=use_cache, concurrency=concurrency))
+
+async def _iter_category_records(journal_title, metrics, year, scraper, cache, use_cache, concurrency):
+    """
+    Yields (position, record) for each of the metrics' categories as soon as
+    its record is computed (see _category_record). Opens a scraper if none is given;
+    closing the generator early cancels the categories still in flight.
     """
     categories = metrics.get("Categories", [])
     issns = metrics.get("ISSN", [])
-    
     if not categories:
         print("No categories found for this journal.")
-        return []
+        return
 
-    percentile_data = []
-    
-    # Process each category
-    for cat in categories:
-        cat_name = cat['name']
-        cat_type = cat['type'] 
-        cat_id = cat['id']
-        type_str = 'area' if cat_type == 'Subject Area' else 'category'
-        
-        print(f"\nProcessing {cat_type}: {cat_name} (ID: {cat_id})...")
-        
-        try:
-            # Use standalone function
-            df = download_journal_rankings(year, cat_id, type_str)
+    if scraper is None:
+        async with AsyncSJRScraper(max_pages=max(concurrency, 1)) as own_scraper:
+            stream = _iter_category_records(journal_title, metrics, year, own_scraper, cache, use_cache, concurrency)
+            try:
+                async for item in stream:
+                    yield item
+            finally:
+                await stream.aclose()
+        return
+
+    cache = _resolve_cache(cache, use_cache)
+    slots = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(pos, cat):
+        async with slots:
+            return pos, await _category_record(scraper, cache, year, cat, journal_title, issns)
+
+    tasks = [asyncio.ensure_future(run(pos, cat)) for pos, cat in enumerate(categories)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def iter_percentiles_from_metrics_async(journal_title, metrics, year="2022", scraper=None, cache=None,
+                                              use_cache=True, concurrency=1):
+    """
+    Streaming variant of calculate_percentiles_from_metrics_async: an async generator
+    yielding one record per category as soon as it is computed (completion order).
+    A record is the result dict with Status 'ok', or a failure record with Category,
+    Type, Status ('not_listed', 'download_failed' or 'error') and Error.
+    Stopping the iteration early cancels the categories still in flight.
+    """
+    stream = _iter_category_records(journal_title, metrics, year, scraper, cache, use_cache, concurrency)
+    try:
+        async for _, record in stream:
+            yield record
+    finally:
+        await stream.aclose()
+
+def iter_percentiles_from_metrics(journal_title, metrics, year="2022", scraper=None, cache=None, use_cache=True,
+                                  concurrency=1, scraper_options=None):
+    """
+    Blocking generator over iter_percentiles_from_metrics_async: yields each category's
+    record as soon as it is ready. Pass an open SJRScraper to reuse its browser.
+    """
+    if scraper is None:
+        with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as own_scraper:
+            yield from iter_percentiles_from_metrics(journal_title, metrics, year, scraper=own_scraper, cache=cache,
+                                                     use_cache=use_cache, concurrency=concurrency)
+        return
+
+    stream = iter_percentiles_from_metrics_async(journal_title, metrics, year, scraper=scraper.async_scraper,
+                                                 cache=cache, use_cache=use_cache, concurrency=concurrency)
+    try:
+        while True:
+            try:
+                record = scraper.run(stream.__anext__())
+            except StopAsyncIteration:
+                return
+            yield record
+    finally:
+        scraper.run(stream.aclose())
+
+def stream_journal_percentiles(journal_name, year="2022", use_cache=True, concurrency=1, refresh=False,
+                               scraper_options=None):
+    """
+    Searches for a journal, then yields its per-category records as they are computed
+    (see iter_percentiles_from_metrics). Yields nothing if the journal is not found.
+    """
+    with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as scraper:
+        print(f"Searching for '{journal_name}'...")
+        results = scraper.search_journal(journal_name)
+        if not results:
+            print("Journal not found.")
+            return
+        target_journal = results[0]
+        print(f"Found: {target_journal['title']}")
+        metrics = scraper.get_journal_metrics(target_journal['url'], refresh=refresh)
+        yield from iter_percentiles_from_metrics(target_journal['title'], metrics, year, scraper=scraper,
+                                                 use_cache=use_cache, concurrency=concurrency)
+
+STREAM_COLUMNS = ["Category", "Type", "Status", "Rank", "Total Journals", "Percentile", "SJR", "Quartile", "Error"]
+
+def parse_years(spec):
+    """
+    Expands a year specification such as '2015-2022', '2018,2020' or '2015-2017,2022'
+    into a sorted list of year strings.
+    """
+    years = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(p) for p in part.split('-', 1))
+            if start > end:
+                start, end = end, start
+            years.update(range(start, end + 1))
+        else:
+            years.add(int(part))
+    return [str(y) for y in sorted(years)]
+
+TRAJECTORY_COLUMNS = ["Year", "Category", "Type", "Rank", "Total Journals", "Percentile", "SJR", "Quartile"]
+
+async def calculate_trajectory_from_metrics_async(journal_title, metrics, years, scraper=None, cache=None,
+                                                  use_cache=True, concurrency=4):
+    """
+    Calculates the journal's percentile in each of its categories for every given year.
+    All (year, category) tables are scheduled together on one browser session and
+    the ranking cache. Returns a long-format DataFrame, one row per (year, category)
+    in which the journal is listed.
+    """
+    categories = metrics.get("Categories", [])
+    issns = metrics.get("ISSN", [])
+    if not categories or not years:
+        print("No categories found for this journal." if not categories else "No years given.")
+        return pd.DataFrame(columns=TRAJECTORY_COLUMNS)
+
+    if scraper is None:
+        async with AsyncSJRScraper(max_pages=max(concurrency, 1)) as own_scraper:
+            return await calculate_trajectory_from_metrics_async(journal_title, metrics, years, scraper=own_scraper,
+                                                                 cache=cache, use_cache=use_cache,
+                                                                 concurrency=concurrency)
+
+    cache = _resolve_cache(cache, use_cache)
+
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    pairs = [(str(year), cat) for year in years for cat in categories]
+    print(f"Loading {len(pairs)} ranking tables ({len(years)} years x {len(categories)} categories)...")
+
+    async def run(year, cat):
+        async with slots:
+            result = await _process_category(scraper, cache, year, cat, journal_title, issns)
+        return {"Year": year, **result} if result is not None else None
+
+    results = await asyncio.gather(*(run(year, cat) for year, cat in pairs))
+    df = pd.DataFrame([r for r in results if r is not None], columns=TRAJECTORY_COLUMNS)
+    return df.sort_values(["Category", "Year"], kind="stable").reset_index(drop=True)
+
+async def get_journal_trajectory_async(journal_name, years, scraper=None, use_cache=True, concurrency=4,
+                                       refresh=False):
+    """
+    Percentile trajectory of a journal over several years: the journal is searched and
+    its metrics extracted once, then calculate_trajectory_from_metrics_async does the rest.
+    Returns None if the journal is not found.
+    """
+    if scraper is None:
+        async with AsyncSJRScraper(max_pages=max(concurrency, 1)) as own_scraper:
+            return await get_journal_trajectory_async(journal_name, years, scraper=own_scraper, use_cache=use_cache,
+                                                      concurrency=concurrency, refresh=refresh)
+
+    print(f"Searching for '{journal_name}'...")
+    results = await scraper.search_journal(journal_name)
+    if not results:
+        print("Journal not found.")
+        return None
+    target_journal = results[0]
+    print(f"Found: {target_journal['title']}")
+    metrics = await scraper.get_journal_metrics(target_journal['url'], refresh=refresh)
+    return await calculate_trajectory_from_metrics_async(target_journal['title'], metrics, years, scraper=scraper,
+                                                         use_cache=use_cache, concurrency=concurrency)
+
+def get_journal_trajectory(journal_name, years, use_cache=True, concurrency=4, refresh=False, scraper_options=None):
+    """
+    Blocking wrapper over get_journal_trajectory_async.
+    years is a list of years or a specification accepted by parse_years.
+    """
+    if isinstance(years, str):
+        years = parse_years(years)
+    with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as scraper:
+        return scraper.run(get_journal_trajectory_async(journal_name, years, scraper=scraper.async_scraper,
+                                                        use_cache=use_cache, concurrency=concurrency,
+                                                        refresh=refresh))
+
+JOURNAL_LIST_COLUMNS = ['journal', 'title', 'issn', 'query', 'name']
+
+def read_journal_list(path):
+    """
+    Reads journal names or ISSNs from a text file (one per line) or a CSV.
+    For a CSV, a column named journal/title/issn/query/name is used if present,
+    otherwise the first column.
+    """
+    if path.lower().endswith('.txt'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    df = pd.read_csv(path, dtype=str)
+    column = next((c for c in df.columns if str(c).strip().lower() in JOURNAL_LIST_COLUMNS), None)
+    if column is None:
+        df = pd.read_csv(path, dtype=str, header=None)
+        column = df.columns[0]
+    return [v.strip() for v in df[column].dropna() if v.strip()]
+
+async def _resolve_journal(scraper, query, metrics_by_url):
+    """
+    Searches for one journal and fetches its metrics, sharing metric lookups
+    between queries that resolve to the same journal page.
+    Returns (title, metrics) or None if the journal was not found.
+    """
+    results = await scraper.search_journal(query)
+    if not results:
+        print(f"Journal not found: {query}")
+        return None
+    target = results[0]
+    url = target['url']
+    if url not in metrics_by_url:
+        metrics_by_url[url] = asyncio.ensure_future(scraper.get_journal_metrics(url))
+    metrics = await metrics_by_url[url]
+    return target['title'], metrics
+
+async def calculate_batch_percentiles_async(journals, year="2022", scraper=None, cache=None, use_cache=True,
+                                            concurrency=4):
+    """
+    Calculates percentiles for many journals at once.
+    All journals are resolved first, then the union of their subject areas and
+    categories is downloaded exactly once per table, and every journal is matched
+    against the shared tables. Returns one combined DataFrame, one row per
+    (journal, category) match.
+    """
+    if scraper is None:
+        async with AsyncSJRScraper(max_pages=max(concurrency, 1)) as own_scraper:
+            return await calculate_batch_percentiles_async(journals, year, scraper=own_scraper, cache=cache,
+                                                           use_cache=use_cache, concurrency=concurrency)
+
+    cache = _resolve_cache(cache, use_cache)
+
+    slots = asyncio.Semaphore(max(concurrency, 1))
+
+    # 1. Resolve every journal (search + metrics)
+    metrics_by_url = {}
+
+    async def resolve(query):
+        async with slots:
+            try:
+                return await _resolve_journal(scraper, query, metrics_by_url)
+            except Exception as e:
+                print(f"Error resolving {query}: {e}")
+                return None
+
+    print(f"Resolving {len(journals)} journals...")
+    resolved = await asyncio.gather(*(resolve(q) for q in journals))
+
+    # 2. Union of all ranking tables needed
+    tables = {}
+    for entry in resolved:
+        if entry is None:
+            continue
+        for cat in entry[1].get("Categories", []):
+            type_str = 'area' if cat['type'] == 'Subject Area' else 'category'
+            tables.setdefault((type_str, cat['id']), cat['name'])
+
+    async def load(key):
+        type_str, cat_id = key
+        async with slots:
+            try:
+                return await _load_rankings(scraper, cache, year, type_str, cat_id)
+            except Exception as e:
+                print(f"Error loading {tables[key]}: {e}")
+                return None
+
+    print(f"Loading {len(tables)} distinct ranking tables...")
+    keys = list(tables)
+    frames = dict(zip(keys, await asyncio.gather(*(load(k) for k in keys))))
+
+    # 3. Match every journal against the shared tables
+    rows = []
+    for query, entry in zip(journals, resolved):
+        if entry is None:
+            continue
+        title, metrics = entry
+        issns = metrics.get("ISSN", [])
+        for cat in metrics.get("Categories", []):
+            type_str = 'area' if cat['type'] == 'Subject Area' else 'category'
+            df = frames.get((type_str, cat['id']))
             if df is None:
-                print(f"Failed to download data for {cat_name}")
                 continue
-                
-            # Match Logic
-            match_row = None
-            
-            def clean_issn(s):
-                return str(s).replace('-', '').replace(' ', '')
-            
-            if issns:
-                for idx, row in df.iterrows():
-                    row_issn_raw = str(row.get('Issn', ''))
-                    row_issns_list = [clean_issn(x) for x in row_issn_raw.split(',')]
-                    target_issns_clean = [clean_issn(i) for i in issns]
-                    
-                    if any(t_issn in r_issn for r_issn in row_issns_list for t_issn in target_issns_clean):
-                        match_row = row
-                        break
-            
-            if match_row is None:
-                print("ISSN match failed/skipped. Trying Title match...")
-                target_title = journal_title.lower().strip()
-                for idx, row in df.iterrows():
-                    row_title = str(row['Title']).lower().strip()
-                    if row_title == target_title:
-                        match_row = row
-                        break
-            
-            if match_row is not None:
-                rank = match_row['Rank']
-                total = len(df)
-                percentile = ((total - rank + 0.5) / total) * 100
-                
-                result = {
-                    "Category": cat_name,
-                    "Type": cat_type,
-                    "Rank": rank,
-                    "Total Journals": total,
-                    "Percentile": round(percentile, 2),
-                    "SJR": match_row.get('SJR', 'N/A'),
-                    "Quartile": match_row.get('SJR Best Quartile', 'N/A')
-                }
-                percentile_data.append(result)
-                print(f"  -> Rank: {rank}/{total}, Percentile: {round(percentile, 2)}%")
-            else:
-                print(f"  -> Journal not found in ranking list for {cat_name}")
-                
-        except Exception as e:
-            print(f"Error processing {cat_name}: {e}")
-            
-    return percentile_data
+            result = _percentile_from_table(cat, df, title, issns)
+            if result is not None:
+                rows.append({"Query": query, "Journal": title, **result})
+
+    unresolved = [q for q, entry in zip(journals, resolved) if entry is None]
+    if unresolved:
+        print(f"Could not resolve {len(unresolved)} journals: {', '.join(unresolved)}")
+
+    return pd.DataFrame(rows, columns=["Query", "Journal", "Category", "Type", "Rank", "Total Journals",
+                                       "Percentile", "SJR", "Quartile"])
+
+def calculate_batch_percentiles(journals, year="2022", use_cache=True, concurrency=4, scraper_options=None):
+    """
+    Blocking wrapper over calculate_batch_percentiles_async.
+    """
+    with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as scraper:
+        return scraper.run(calculate_batch_percentiles_async(journals, year, scraper=scraper.async_scraper,
+                                                             use_cache=use_cache, concurrency=concurrency))
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Get Scimago Journal Percentiles')
-    parser.add_argument('journal', help='Name of the journal')
+    parser.add_argument('journal', nargs='?', help='Name of the journal')
     parser.add_argument('--year', default='2022', help='Year for ranking data')
+    parser.add_argument('--years', help='Year range for a percentile trajectory, e.g. 2015-2022 or 2018,2020')
+    parser.add_argument('--no-cache', action='store_true', help='Always download ranking data, bypassing the local cache')
+    parser.add_argument('--concurrency', type=int, default=None, help='Number of downloads to run in parallel')
+    parser.add_argument('--refresh', action='store_true', help='Re-scrape journal metrics instead of using cached ones')
+    parser.add_argument('--block-resources', action='store_true', help='Skip images, fonts, media and ad/analytics requests')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window instead of running headless')
+    parser.add_argument('--batch', help='CSV or text file of journal names/ISSNs to process together')
+    parser.add_argument('--output', help='Write the batch, trajectory or streamed results to this CSV file')
+    parser.add_argument('--stream', action='store_true', help='Print (and with --output, write) each category '
+                                                              'result as soon as it is computed')
+    parser.add_argument('--timings', action='store_true', help='Print a per-stage timing summary at the end')
+    parser.add_argument('--trace', help='Write per-stage timing spans to this file (.jsonl for JSON lines, '
+                                        'otherwise Chrome trace format)')
     
     args = parser.parse_args()
+    if not args.journal and not args.batch:
+        parser.error('give a journal name or --batch FILE')
+    if args.years and args.batch:
+        parser.error('--years cannot be combined with --batch')
+    if args.stream and (args.batch or args.years):
+        parser.error('--stream only applies to a single journal and year')
+    scraper_options = {"block_resources": args.block_resources, "headless": not args.headed}
+    if args.timings or args.trace:
+        get_tracer().enable()
     
-    results = get_journal_percentiles(args.journal, args.year)
-    
-    if results:
-        print("\n=== Summary Results ===")
-        df_res = pd.DataFrame(results)
-        print(df_res[['Category', 'Type', 'Rank', 'Total Journals', 'Percentile']].to_string(index=False))
+    if args.years:
+        df_res = get_journal_trajectory(args.journal, parse_years(args.years), use_cache=not args.no_cache,
+                                        concurrency=args.concurrency or 4, refresh=args.refresh,
+                                        scraper_options=scraper_options)
+        if df_res is not None and not df_res.empty:
+            print("\n=== Percentile Trajectory ===")
+            print(df_res.pivot_table(index='Category', columns='Year', values='Percentile').to_string())
+            if args.output:
+                df_res.to_csv(args.output, index=False)
+                print(f"\nResults written to {args.output}")
+    elif args.stream:
+        import csv
+        out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else None
+        try:
+            writer = csv.DictWriter(out, fieldnames=STREAM_COLUMNS, extrasaction='ignore') if out else None
+            if writer:
+                writer.writeheader()
+            for record in stream_journal_percentiles(args.journal, args.year, use_cache=not args.no_cache,
+                                                     concurrency=args.concurrency or 1, refresh=args.refresh,
+                                                     scraper_options=scraper_options):
+                if record["Status"] == STATUS_OK:
+                    print(f"[ok] {record['Category']}: rank {record['Rank']}/{record['Total Journals']}, "
+                          f"percentile {record['Percentile']}%")
+                else:
+                    print(f"[{record['Status']}] {record['Category']}: {record['Error']}")
+                if writer:
+                    writer.writerow(record)
+                    out.flush()
+        finally:
+            if out:
+                out.close()
+                print(f"\nResults written to {args.output}")
+    elif args.batch:
+        journals = read_journal_list(args.batch)
+        df_res = calculate_batch_percentiles(journals, args.year, use_cache=not args.no_cache,
+                                             concurrency=args.concurrency or 4, scraper_options=scraper_options)
+        print("\n=== Batch Results ===")
+        print(df_res[['Journal', 'Category', 'Rank', 'Total Journals', 'Percentile']].to_string(index=False))
+        if args.output:
+            df_res.to_csv(args.output, index=False)
+            print(f"\nResults written to {args.output}")
+    else:
+        results = get_journal_percentiles(args.journal, args.year, use_cache=not args.no_cache,
+                                          concurrency=args.concurrency or 1, refresh=args.refresh,
+                                          scraper_options=scraper_options)
+        
+        if results:
+            print("\n=== Summary Results ===")
+            df_res = pd.DataFrame(results)
+            print(df_res[['Category', 'Type', 'Rank', 'Total Journals', 'Percentile']].to_string(index=False))
+
+    mark("result")
+
+    if not args.no_cache:
+        print(f"\nRanking cache: {get_default_cache().stats()}")
+        compacted = compact_stats()
+        if compacted["tables"]:
+            print(f"Compacted {compacted['tables']} ranking tables: "
+                  f"{compacted['bytes_before'] / 1e6:.1f} MB -> {compacted['bytes_after'] / 1e6:.1f} MB "
+                  f"({compacted['saved_ratio']:.0%} saved)")
+
+    tracer = get_tracer()
+    if tracer.enabled:
+        print_milestones()
+        tracer.print_summary()
+        if args.trace:
+            tracer.export(args.trace)
+            print(f"Trace written to {args.trace}")
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+
+# Benchmarks must not read or fill the user's ranking cache and snapshots
+os.environ["SJR_CACHE_DIR"] = tempfile.mkdtemp(prefix="sjr_bench_")
+
+from sjr_scraper import AsyncSJRScraper
+from sjr_analytics import calculate_percentiles_from_metrics_async
+from sjr_fixtures import FixtureSite, FixtureServer
+
+BENCHMARK_YEAR = "2022"
+
+def _summary(name, params, runs):
+    return {
+        "name": name,
+        "params": params,
+        "runs": [round(r, 4) for r in runs],
+        "mean": round(statistics.mean(runs), 4),
+        "median": round(statistics.median(runs), 4),
+        "min": round(min(runs), 4),
+    }
+
+async def _timed(repeats, make_call):
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await make_call()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+def _scraper(server, **options):
+    # Caches and the local search index are disabled so every call does the real work;
+    # the request scheduler's politeness limits would only measure themselves against a local server
+    return AsyncSJRScraper(headless=True, base_url=server.url, metrics_cache=False, search_index=False,
+                           scheduler=False, **options)
+
+async def _run_suite(server, site, repeats, category_counts, concurrencies):
+    results = []
+
+    async with _scraper(server) as scraper:
+        # Launch the browser outside the timed sections
+        await scraper.start()
+
+        runs = await _timed(repeats, lambda: scraper.search_journal("Fixture Journal 12", local=False))
+        results.append(_summary("search_journal", {}, runs))
+        print(f"search_journal: {results[-1]['median']:.3f}s")
+
+        url = f"journalsearch.php?q={site.sid(0)}&tip=sid&clean=0"
+        runs = await _timed(repeats, lambda: scraper.get_journal_metrics(url, refresh=True))
+        results.append(_summary("get_journal_metrics", {}, runs))
+        print(f"get_journal_metrics: {results[-1]['median']:.3f}s")
+
+        cat_id = next(iter(site.categories))
+        runs = await _timed(repeats, lambda: scraper.download_journal_rankings(BENCHMARK_YEAR, cat_id, "category"))
+        results.append(_summary("download_journal_rankings", {"path": "http"}, runs))
+        print(f"download_journal_rankings (http): {results[-1]['median']:.3f}s")
+
+    async with _scraper(server, http_fast_path=False) as scraper:
+        await scraper.start()
+        runs = await _timed(repeats, lambda: scraper.download_journal_rankings(BENCHMARK_YEAR, cat_id, "category"))
+        results.append(_summary("download_journal_rankings", {"path": "browser"}, runs))
+        print(f"download_journal_rankings (browser): {results[-1]['median']:.3f}s")
+
+    for concurrency in concurrencies:
+        async with _scraper(server, max_pages=concurrency) as scraper:
+            await scraper.start()
+            for categories in category_counts:
+                metrics = site.benchmark_metrics(categories)
+                runs = await _timed(repeats, lambda: calculate_percentiles_from_metrics_async(
+                    site.title(0), metrics, BENCHMARK_YEAR, scraper=scraper, use_cache=False,
+                    concurrency=concurrency))
+                params = {"categories": categories, "concurrency": concurrency}
+                results.append(_summary("calculate_percentiles_from_metrics", params, runs))
+                print(f"calculate_percentiles_from_metrics {params}: {results[-1]['median']:.3f}s")
+    return results
+
+def run_benchmarks(repeats=3, category_counts=(1, 4, 8), concurrencies=(1, 2, 4), latency=0.05, site=None):
+    """
+    Runs the benchmark suite against a local FixtureServer and returns a JSON-ready report.
+    latency is added to every fixture request to approximate the real site.
+    """
+    site = site or FixtureSite()
+    # Generate every export up front so the timings do not include fixture generation
+    for cat_id in list(site.categories)[:max(category_counts, default=1)]:
+        site.export(BENCHMARK_YEAR, "category", str(cat_id))
+
+    with FixtureServer(site, latency=latency) as server:
+        started = time.perf_counter()
+        results = asyncio.run(_run_suite(server, site, repeats, category_counts, concurrencies))
+        total = time.perf_counter() - started
+        requests = server.request_count
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"repeats": repeats, "latency": latency, "category_counts": list(category_counts),
+                     "concurrencies": list(concurrencies)},
+        "total_seconds": round(total, 3),
+        "requests": requests,
+        "results": results,
+    }
+
+def _result_key(result):
+    return (result["name"], json.dumps(result["params"], sort_keys=True))
+
+def compare_reports(baseline, current, threshold=0.10):
+    """
+    Compares the median of every benchmark present in both reports.
+    Returns a list of (name, params, baseline, current, change) and prints it;
+    change is the relative slowdown (positive) or speedup (negative).
+    """
+    base = {_result_key(r): r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        old = base.get(_result_key(result))
+        if old is None or not old["median"]:
+            continue
+        change = (result["median"] - old["median"]) / old["median"]
+        rows.append((result["name"], result["params"], old["median"], result["median"], change))
+
+    for name, params, old, new, change in rows:
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name} {params}: {old:.3f}s -> {new:.3f}s ({change:+.0%}){flag}")
+    return rows
+
+def _int_list(text):
+    return [int(v) for v in text.split(',') if v.strip()]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the scraper against a local Scimago stand-in')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per benchmark')
+    parser.add_argument('--categories', default='1,4,8', help='Category counts for calculate_percentiles_from_metrics')
+    parser.add_argument('--concurrency', default='1,2,4', help='Concurrency levels for calculate_percentiles_from_metrics')
+    parser.add_argument('--latency', type=float, default=0.05, help='Delay added to every fixture request, in seconds')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    parser.add_argument('--compare', default=None, help='Baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown reported as a regression')
+
+    args = parser.parse_args()
+
+    report = run_benchmarks(repeats=args.repeats, category_counts=_int_list(args.categories),
+                            concurrencies=_int_list(args.concurrency), latency=args.latency)
+    output = args.output or f"benchmark_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare}:")
+        rows = compare_reports(baseline, report, args.threshold)
+        if any(change > args.threshold for *_, change in rows):
+            sys.exit(1)
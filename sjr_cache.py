@@ -0,0 +1,258 @@
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get("SJR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".sjr_cache"))
+
+def to_parquet_frame(df):
+    """
+    Returns a copy of df that Parquet can store.
+    Scimago exports mix numbers and text in the same column, so object columns become strings.
+    """
+    to_store = df.copy()
+    for col in to_store.columns:
+        if to_store[col].dtype == object:
+            to_store[col] = to_store[col].astype("string")
+    return to_store
+
+def read_parquet_columns(source, columns=None):
+    """
+    Reads a Parquet file or buffer, keeping only those of the requested columns it has.
+    """
+    if columns is not None:
+        import pyarrow.parquet as pq
+        available = pq.ParquetFile(source).schema_arrow.names
+        columns = [c for c in columns if c in available]
+        if hasattr(source, "seek"):
+            source.seek(0)
+    return pd.read_parquet(source, columns=columns)
+
+class RankingCache:
+    """
+    On-disk cache of parsed ranking tables, stored as Parquet files keyed by (year, type, id).
+    Past years never expire; tables for the current year expire after current_year_ttl seconds.
+    When the total size exceeds max_bytes the least recently used tables are evicted.
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir=None, max_bytes=500 * 1024 * 1024, current_year_ttl=24 * 3600):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "rankings")
+        self.max_bytes = max_bytes
+        self.current_year_ttl = current_year_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    @staticmethod
+    def key(year, type_str, id_value):
+        return f"{year}_{type_str}_{id_value}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _load_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose files were removed behind our back
+        return {k: v for k, v in index.items() if os.path.exists(self._path(k))}
+
+    def _save_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
+
+    def _is_expired(self, entry):
+        if str(entry["year"]) < str(datetime.now().year):
+            return False
+        return time.time() - entry["created"] > self.current_year_ttl
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]["size"]
+            self._remove(key)
+            self.evictions += 1
+
+    def get(self, year, type_str, id_value):
+        """
+        Returns the cached DataFrame or None on a miss (absent or expired).
+        """
+        key = self.key(year, type_str, id_value)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or self._is_expired(entry):
+                if entry is not None:
+                    self._remove(key)
+                    self._save_index()
+                self.misses += 1
+                return None
+            try:
+                df = pd.read_parquet(self._path(key))
+            except Exception as e:
+                print(f"Error reading cached table {key}: {e}")
+                self._remove(key)
+                self._save_index()
+                self.misses += 1
+                return None
+            # Kept in memory only; written out with the next put or removal, so
+            # hits do not serialise on index rewrites
+            entry["last_access"] = time.time()
+            self.hits += 1
+            return df
+
+    def put(self, year, type_str, id_value, df):
+        """
+        Stores a ranking DataFrame, evicting old entries if the cache grows too large.
+        """
+        key = self.key(year, type_str, id_value)
+        to_store = to_parquet_frame(df)
+        with self._lock:
+            path = self._path(key)
+            to_store.to_parquet(path, index=False)
+            now = time.time()
+            self._index[key] = {
+                "year": str(year),
+                "type": type_str,
+                "id": str(id_value),
+                "created": now,
+                "last_access": now,
+                "size": os.path.getsize(path),
+            }
+            self._evict()
+            self._save_index()
+
+    def iter_tables(self, columns=None):
+        """
+        Yields every cached table, reading only the given columns when they exist.
+        """
+        with self._lock:
+            keys = list(self._index)
+        for key in keys:
+            try:
+                yield read_parquet_columns(self._path(key), columns)
+            except Exception:
+                continue
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current on-disk footprint.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": sum(e["size"] for e in self._index.values()),
+            }
+
+_default_cache = None
+
+def get_default_cache():
+    """
+    Returns the shared process-wide RankingCache.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RankingCache()
+    return _default_cache
+
+def source_id(url):
+    """
+    Extracts the Scimago source id (the q=<sid> parameter) from a journal URL, or None.
+    """
+    match = re.search(r'[?&]q=(\d+)', url or "")
+    return match.group(1) if match else None
+
+class MetricsCache:
+    """
+    On-disk cache of get_journal_metrics results, one JSON file per Scimago source id.
+    Entries older than ttl seconds are treated as misses.
+    """
+    def __init__(self, cache_dir=None, ttl=7 * 24 * 3600):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, "metrics")
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.cache_dir, f"{sid}.json")
+
+    def get(self, sid):
+        """
+        Returns the cached metrics dict for a source id, or None on a miss or expiry.
+        """
+        with self._lock:
+            try:
+                with open(self._path(sid), "r") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            if time.time() - entry["fetched_at"] > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["metrics"]
+
+    def put(self, sid, metrics):
+        with self._lock:
+            path = self._path(sid)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"fetched_at": time.time(), "metrics": metrics}, f)
+            os.replace(tmp_path, path)
+
+    def invalidate(self, sid):
+        with self._lock:
+            try:
+                os.remove(self._path(sid))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+_default_metrics_cache = None
+
+def get_default_metrics_cache():
+    """
+    Returns the shared process-wide MetricsCache.
+    """
+    global _default_metrics_cache
+    if _default_metrics_cache is None:
+        _default_metrics_cache = MetricsCache()
+    return _default_metrics_cache
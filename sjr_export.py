@@ -0,0 +1,201 @@
+import io
+import threading
+import pandas as pd
+
+# Columns of the Scimago ranking export that the analytics use
+RANKING_COLUMNS = [
+    "Rank", "Sourceid", "Title", "Type", "Issn", "SJR", "SJR Best Quartile",
+    "H index", "Country", "Publisher",
+]
+
+INTEGER_COLUMNS = {"Rank": "Int32", "Sourceid": "Int64", "H index": "Int32"}
+
+# Low-cardinality text columns held as categoricals in the compact schema
+CATEGORY_COLUMNS = ["Type", "SJR Best Quartile", "Country", "Region", "Publisher"]
+
+# The compact schema replaces the 'Issn' text column with up to MAX_ISSNS packed integer columns
+MAX_ISSNS = 4
+ISSN_COLUMNS = [f"Issn {i}" for i in range(1, MAX_ISSNS + 1)]
+
+XLSX_MAGIC = b"PK\x03\x04"
+XLS_MAGIC = b"\xd0\xcf\x11\xe0"
+
+def detect_format(data):
+    """
+    Identifies an export from its first bytes: 'xlsx', 'xls' or 'csv'.
+    """
+    if data[:4] == XLSX_MAGIC:
+        return "xlsx"
+    if data[:4] == XLS_MAGIC:
+        return "xls"
+    return "csv"
+
+def _read_xlsx(data, columns):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=columns or [])
+        header = [str(h).strip() if h is not None else "" for h in header]
+        keep = [(i, h) for i, h in enumerate(header) if h and (columns is None or h in columns)]
+        values = {h: [] for _, h in keep}
+        if not keep:
+            return pd.DataFrame(values)
+        # Cells right of the last kept column are never materialized
+        rows = workbook.active.iter_rows(min_row=2, max_col=keep[-1][0] + 1, values_only=True)
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            for i, h in keep:
+                values[h].append(row[i] if i < len(row) else None)
+        return pd.DataFrame(values)
+    finally:
+        workbook.close()
+
+def _read_csv(data, columns):
+    usecols = (lambda c: c.strip() in columns) if columns is not None else None
+    df = pd.read_csv(io.BytesIO(data), sep=';', quotechar='"', on_bad_lines='skip', usecols=usecols,
+                     dtype={"Issn": str, "SJR": str})
+    df.columns = [c.strip() for c in df.columns]
+    return df
+
+def parse_rankings_export(data, columns=RANKING_COLUMNS, compact=True):
+    """
+    Parses a ranking export held in memory.
+    The format is detected from the leading bytes rather than by trial and error;
+    xlsx is streamed row by row with a read-only workbook. Only the given columns
+    are kept (None keeps all) and, unless compact is False, the table is converted
+    to the compact schema (see compact_rankings).
+    """
+    fmt = detect_format(data)
+    if fmt == "xlsx":
+        df = _read_xlsx(data, columns)
+    elif fmt == "xls":
+        df = pd.read_excel(io.BytesIO(data), usecols=(lambda c: c in columns) if columns is not None else None)
+    else:
+        df = _read_csv(data, columns)
+
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return compact_rankings(df) if compact else df
+
+def pack_issn(issn):
+    """
+    Packs an ISSN ('1234-567X') into an int: the 7 digits times 11 plus the check digit (X = 10).
+    Returns None if the text is not an ISSN.
+    """
+    issn = str(issn).replace('-', '').replace(' ', '').upper()
+    if len(issn) != 8 or not issn[:7].isdigit() or not (issn[7].isdigit() or issn[7] == 'X'):
+        return None
+    return int(issn[:7]) * 11 + (10 if issn[7] == 'X' else int(issn[7]))
+
+def unpack_issn(value):
+    """
+    Inverse of pack_issn: returns the 8-character ISSN without hyphen.
+    """
+    value = int(value)
+    check = value % 11
+    return f"{value // 11:07d}{'X' if check == 10 else check}"
+
+def _pack_issn_column(issns):
+    """
+    Splits a comma-separated 'Issn' column into packed Int32 'Issn N' columns.
+    """
+    parts = (issns.astype("string").str.replace(r'[-\s]', '', regex=True).str.upper()
+             .str.split(',', expand=True))
+    packed = {}
+    for i, col in enumerate(ISSN_COLUMNS):
+        if i >= parts.shape[1]:
+            break
+        part = parts[i].astype("string")
+        valid = part.str.fullmatch(r'\d{7}[\dX]').fillna(False).astype(bool)
+        body = pd.to_numeric(part.str[:7].where(valid), errors='coerce')
+        check = pd.to_numeric(part.str[7].where(valid).replace('X', '10'), errors='coerce')
+        packed[col] = (body * 11 + check).astype("Int32")
+    return pd.DataFrame(packed, index=issns.index)
+
+def issn_series(df):
+    """
+    Returns every ISSN of a ranking table as 8-character strings, one entry per ISSN,
+    indexed by row position. Works on both the compact (packed) and the raw 'Issn' layout.
+    """
+    packed = [c for c in ISSN_COLUMNS if c in df.columns]
+    if packed:
+        values = pd.concat([df[c].reset_index(drop=True) for c in packed]).dropna().astype("int64")
+        check = (values % 11).astype("string").replace("10", "X")
+        issns = (values // 11).astype("string").str.zfill(7) + check
+        return issns.sort_index(kind="stable")
+    if 'Issn' in df.columns:
+        issns = df['Issn'].reset_index(drop=True).astype("string").fillna("")
+        exploded = issns.str.replace(r'[-\s]', '', regex=True).str.upper().str.split(',').explode()
+        return exploded[exploded.notna() & (exploded != "")].astype("string")
+    return pd.Series([], dtype="string")
+
+_compact_lock = threading.Lock()
+_compact_stats = {"tables": 0, "bytes_before": 0, "bytes_after": 0}
+
+def compact_rankings(df, report=False):
+    """
+    Converts a ranking table to the compact in-memory schema:
+    SJR as float32 (Scimago writes comma decimals), Rank and H index as Int32,
+    low-cardinality text as categoricals, titles as Arrow strings and the ISSNs
+    packed into integer columns. Already compact tables are returned unchanged.
+    The memory saved is added to compact_stats(); report=True also prints it.
+    """
+    if df is None:
+        return df
+    convert_sjr = 'SJR' in df.columns and df['SJR'].dtype != "float32"
+    integers = {col: dtype for col, dtype in INTEGER_COLUMNS.items()
+                if col in df.columns and df[col].dtype != dtype}
+    categories = [col for col in CATEGORY_COLUMNS
+                  if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+    convert_title = 'Title' in df.columns and df['Title'].dtype != "string[pyarrow]"
+    pack_issns = 'Issn' in df.columns
+    if not (convert_sjr or integers or categories or convert_title or pack_issns):
+        # Cache and snapshot reads are already compact; do not pay for a copy
+        return df
+
+    # Shallow: converted columns are replaced, the others stay shared with df
+    out = df.copy(deep=False)
+    if convert_sjr:
+        sjr = out['SJR']
+        if not pd.api.types.is_numeric_dtype(sjr):
+            sjr = sjr.astype("string").str.replace(',', '.', regex=False).str.strip()
+        out['SJR'] = pd.to_numeric(sjr, errors='coerce').astype("float32")
+    for col, dtype in integers.items():
+        out[col] = pd.to_numeric(out[col], errors='coerce').astype(dtype)
+    for col in categories:
+        out[col] = out[col].astype("string").astype("category")
+    if convert_title:
+        out['Title'] = out['Title'].astype("string[pyarrow]")
+    if pack_issns:
+        position = out.columns.get_loc('Issn')
+        packed = _pack_issn_column(out['Issn'])
+        out = out.drop(columns='Issn')
+        for offset, col in enumerate(packed.columns):
+            out.insert(position + offset, col, packed[col])
+
+    before = int(df.memory_usage(deep=True).sum())
+    after = int(out.memory_usage(deep=True).sum())
+    with _compact_lock:
+        _compact_stats["tables"] += 1
+        _compact_stats["bytes_before"] += before
+        _compact_stats["bytes_after"] += after
+    if report:
+        print(f"Compacted ranking table: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+    return out
+
+def compact_stats():
+    """
+    Returns how many tables compact_rankings converted and their memory before and after.
+    """
+    with _compact_lock:
+        stats = dict(_compact_stats)
+    saved = stats["bytes_before"] - stats["bytes_after"]
+    stats["bytes_saved"] = saved
+    stats["saved_ratio"] = round(saved / stats["bytes_before"], 3) if stats["bytes_before"] else 0.0
+    return stats
@@ -0,0 +1,290 @@
+import io
+import os
+import time
+import html
+import threading
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+class FixtureSite:
+    """
+    Deterministic stand-in for the Scimago pages the scraper uses: the home page with
+    its search box, search results, journal detail pages, journalrank.php listing
+    pages and their xlsx exports. Journal 0 ("Fixture Journal 0") is listed in every
+    ranking table, so it can be matched in any number of categories.
+    Pages found in recorded_dir (home.html, search.html, journal.html, journalrank.html)
+    are served instead of the generated ones.
+    """
+    def __init__(self, areas=4, categories_per_area=8, journals=3000, journals_per_table=400, recorded_dir=None):
+        self.areas = {(11 + a) * 100: f"Fixture Area {a}" for a in range(areas)}
+        self.categories = {}
+        for area_id in self.areas:
+            for k in range(categories_per_area):
+                self.categories[area_id + k + 1] = (f"Fixture Category {area_id + k + 1}", area_id)
+        self.journals = journals
+        self.journals_per_table = min(journals_per_table, journals)
+        self.recorded_dir = recorded_dir
+
+        # Table membership: category c lists journal 0 plus a contiguous slice of the others
+        self.members = {}
+        self.journal_categories = {}
+        for n, cat_id in enumerate(self.categories):
+            start = 1 + (n * 97) % max(journals - 1, 1)
+            members = [0] + [1 + (start + r) % (journals - 1) for r in range(self.journals_per_table - 1)]
+            self.members[cat_id] = members
+            for j in members:
+                self.journal_categories.setdefault(j, []).append(cat_id)
+
+    # --- synthetic data ---
+
+    @staticmethod
+    def sid(j):
+        return 20000000 + j
+
+    @staticmethod
+    def title(j):
+        return f"Fixture Journal {j}"
+
+    @staticmethod
+    def issns(j):
+        return [f"{1000000 + j:07d}{j % 10}", f"{2000000 + j:07d}{'X' if j % 11 == 0 else j % 10}"]
+
+    @staticmethod
+    def publisher(j):
+        return f"Fixture Publisher {j % 40}"
+
+    @staticmethod
+    def sjr(j, year):
+        return round(0.1 + ((j * 7919 + int(year) * 31) % 5000) / 1000, 3)
+
+    def journal_from_sid(self, sid):
+        j = int(sid) - 20000000
+        return j if 0 <= j < self.journals else None
+
+    def table_rows(self, year, type_str, id_value):
+        """
+        Rows of one ranking table, best SJR first.
+        """
+        id_value = int(id_value)
+        if type_str == 'area':
+            members = sorted({j for c, (_, area) in self.categories.items() if area == id_value
+                              for j in self.members[c]})
+        else:
+            members = self.members.get(id_value, [])
+        ranked = sorted(members, key=lambda j: -self.sjr(j, year))
+        return [(rank, j) for rank, j in enumerate(ranked, start=1)]
+
+    def benchmark_metrics(self, categories):
+        """
+        get_journal_metrics-shaped metrics for journal 0 limited to the first categories.
+        """
+        cats = list(self.categories)[:categories]
+        return {
+            "SJR": str(self.sjr(0, 2022)), "Quartile": "Q1", "H-Index": "50",
+            "ISSN": self.issns(0), "Publisher": self.publisher(0),
+            "Categories": [{"name": self.categories[c][0], "type": "Category", "id": str(c)} for c in cats],
+        }
+
+    # --- pages ---
+
+    def _recorded(self, name):
+        if self.recorded_dir:
+            path = os.path.join(self.recorded_dir, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return f.read()
+        return None
+
+    @staticmethod
+    def _page(title, body):
+        return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head>"
+                f"<body>{body}</body></html>").encode("utf-8")
+
+    def home_page(self):
+        return self._recorded("home.html") or self._page("Scimago Journal & Country Rank", (
+            "<form action='journalsearch.php' method='get'>"
+            "<input id='searchinput' name='q' type='text' autocomplete='off'>"
+            "</form>"))
+
+    def search_page(self, query):
+        recorded = self._recorded("search.html")
+        if recorded:
+            return recorded
+        q = query.strip().lower()
+        digits = q.replace('-', '')
+        hits = [j for j in range(self.journals)
+                if q in self.title(j).lower() or digits in self.issns(j)][:50]
+        links = "".join(
+            f"<a href='journalsearch.php?q={self.sid(j)}&amp;tip=sid&amp;clean=0'>"
+            f"<span class='jrnlname'>{html.escape(self.title(j))}</span></a>" for j in hits)
+        return self._page("Journal Search", f"<div class='search_results'>{links}</div>")
+
+    def journal_page(self, sid):
+        recorded = self._recorded("journal.html")
+        if recorded:
+            return recorded
+        j = self.journal_from_sid(sid)
+        if j is None:
+            return None
+        cats = self.journal_categories.get(j, [])
+        by_area = {}
+        for c in cats:
+            by_area.setdefault(self.categories[c][1], []).append(c)
+        subject_links = "".join(
+            f"<li><a href='journalrank.php?area={area}'>{html.escape(self.areas[area])}</a><ul>"
+            + "".join(f"<li><a href='journalrank.php?category={c}'>{html.escape(self.categories[c][0])}</a></li>"
+                      for c in area_cats)
+            + "</ul></li>" for area, area_cats in by_area.items())
+        sjr_rows = "".join(f"<tr><td>{y}</td><td>{self.sjr(j, y)}</td></tr>" for y in range(2015, 2024))
+        quartile_rows = "".join(f"<tr><td>{html.escape(self.categories[c][0])}</td><td>{y}</td><td>Q1</td></tr>"
+                                for c in cats[:3] for y in range(2015, 2024))
+        return self._page(self.title(j), (
+            f"<h1>{html.escape(self.title(j))}</h1>"
+            f"<div><h2>Subject Area and Category</h2><ul>{subject_links}</ul></div>"
+            f"<div><h2>Publisher</h2><a>{html.escape(self.publisher(j))}</a></div>"
+            f"<div><h2>ISSN</h2><p>{', '.join(self.issns(j))}</p></div>"
+            f"<div class='cuadrado'><h2>H-Index</h2><p class='hindexnumber'>{50 + j % 100}</p></div>"
+            f"<div class='content-hindex'><span class='hsjr'>{self.sjr(j, 2022)}</span>"
+            f"<div class='hindexnumber'><span class='Q1'>Q1</span></div></div>"
+            f"<table><thead><tr><th>Year</th><th>SJR</th></tr></thead><tbody>{sjr_rows}</tbody></table>"
+            f"<table><thead><tr><th>Category</th><th>Year</th><th>Quartile</th></tr></thead>"
+            f"<tbody>{quartile_rows}</tbody></table>"))
+
+    def ranking_page(self, year, area=None, category=None):
+        recorded = self._recorded("journalrank.html")
+        if recorded:
+            return recorded
+        links = "".join(f"<a href='journalrank.php?area={a}&amp;year={year}'>{html.escape(name)}</a>"
+                        for a, name in self.areas.items())
+        if area is not None:
+            links += "".join(
+                f"<a href='journalrank.php?category={c}&amp;area={area}&amp;year={year}'>{html.escape(name)}</a>"
+                for c, (name, a) in self.categories.items() if a == int(area))
+        button = ""
+        if category is not None or area is not None:
+            type_str, id_value = ("category", category) if category is not None else ("area", area)
+            button = (f"<a class='button' href='journalrank.php?{type_str}={id_value}&amp;year={year}&amp;out=xls'>"
+                      f"Download data</a>")
+        return self._page("Scimago Journal Rank", f"<div id='menu'>{links}</div>{button}")
+
+    @lru_cache(maxsize=256)
+    def export(self, year, type_str, id_value):
+        """
+        The xlsx export of one ranking table, laid out like Scimago's.
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(["Rank", "Sourceid", "Title", "Type", "Issn", "SJR", "SJR Best Quartile", "H index",
+                      "Total Docs. (2022)", "Country", "Region", "Publisher", "Coverage", "Categories", "Areas"])
+        rows = self.table_rows(year, type_str, id_value)
+        for rank, j in rows:
+            quartile = f"Q{min(4, (rank * 4 - 1) // len(rows) + 1)}"
+            sheet.append([rank, self.sid(j), self.title(j), "journal", ", ".join(self.issns(j)),
+                          str(self.sjr(j, year)).replace('.', ','), quartile, 50 + j % 100, 100 + j % 300,
+                          "United Kingdom", "Western Europe", self.publisher(j), "1990-2023", "", ""])
+        buf = io.BytesIO()
+        workbook.save(buf)
+        return buf.getvalue()
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+        site = server.site
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.rstrip("/") or "/"
+
+        if path in ("/", "/index.php"):
+            return self._send(200, site.home_page())
+        if path == "/journalsearch.php":
+            if params.get("tip") == "sid":
+                body = site.journal_page(params.get("q", ""))
+                return self._send(200, body) if body else self._send(404, site._page("Not found", ""))
+            return self._send(200, site.search_page(params.get("q", "")))
+        if path == "/journalrank.php":
+            year = params.get("year", "2022")
+            if "out" in params:
+                type_str = "category" if "category" in params else "area"
+                id_value = params.get(type_str)
+                if id_value is None:
+                    return self._send(404, site._page("Not found", ""))
+                return self._send(200, site.export(year, type_str, id_value), XLSX_CONTENT_TYPE)
+            return self._send(200, site.ranking_page(year, params.get("area"), params.get("category")))
+        self._send(404, site._page("Not found", ""))
+
+class FixtureServer:
+    """
+    Serves a FixtureSite over HTTP on a background thread.
+    latency adds a fixed delay (seconds) to every request, to approximate a remote site.
+    Use as a context manager; url is the base URL to give the scraper.
+    """
+    def __init__(self, site=None, host="127.0.0.1", port=0, latency=0.0):
+        self.site = site or FixtureSite()
+        self._httpd = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.site = self.site
+        self._httpd.latency = latency
+        self._httpd.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self._httpd.request_count
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the Scimago site')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Delay added to every request, in seconds')
+    parser.add_argument('--recorded', default=None, help='Directory of recorded pages to serve instead of generated ones')
+
+    args = parser.parse_args()
+
+    with FixtureServer(FixtureSite(recorded_dir=args.recorded), port=args.port, latency=args.latency) as server:
+        print(f"Serving fixtures at {server.url} (set SJR_BASE_URL={server.url} to use them). Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
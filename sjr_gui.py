@@ -1,9 +1,18 @@
-import customtkinter as ctk
+# Imported first: its clock is the startup reference for mark()
+from sjr_trace import mark
+import time
+import logging
 import threading
-from sjr_scraper import search_journal, get_journal_metrics
-from sjr_analytics import calculate_percentiles_from_metrics
+import customtkinter as ctk
+
+# pandas, Playwright and openpyxl are only imported when first needed (see load_backend),
+# so the window appears before they load
 
 class SJRApp(ctk.CTk):
+    # Percentile jobs running at once (more are queued), and categories fetched in parallel per job
+    MAX_JOBS = 2
+    JOB_CONCURRENCY = 2
+
     def __init__(self):
         super().__init__()
 
@@ -21,6 +30,7 @@ class SJRApp(ctk.CTk):
         self.search_entry = ctk.CTkEntry(self.input_frame, placeholder_text="Enter journal name...")
         self.search_entry.pack(side="left", fill="x", expand=True, padx=(10, 10), pady=10)
         self.search_entry.bind("<Return>", self.start_search)
+        self.search_entry.bind("<Key>", self.prewarm)
         
         # Year Input
         self.year_entry = ctk.CTkEntry(self.input_frame, width=60, placeholder_text="Year")
@@ -50,10 +60,65 @@ class SJRApp(ctk.CTk):
         self.current_journal_title = None
         self.current_metrics = None
         
+        # One browser session shared by every action; its event loop lets them overlap.
+        # Created by load_backend, on the first keystroke or action.
+        self.scraper = None
+        self._backend_lock = threading.Lock()
+        self._prewarm_started = False
+        self._search_started = None
+        self._first_result = False
+        self.task_queue = None
+        self.job_windows = {}
+        
         # Cleanup on exit
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.after(0, self.report_startup)
+
+    def report_startup(self):
+        elapsed = mark("window shown")
+        self.status_label.configure(text=f"Ready (started in {elapsed:.2f}s)")
+        logging.info(f"Window shown {elapsed:.2f}s after start")
+
+    def load_backend(self):
+        """
+        Imports the scraper and analytics modules and creates the shared scraper, once.
+        """
+        with self._backend_lock:
+            if self.scraper is None:
+                started = time.perf_counter()
+                from sjr_scraper import SJRScraper
+                import sjr_analytics  # noqa: F401 - loads pandas ahead of the first calculation
+                self.scraper = SJRScraper()
+                logging.info(f"Backend modules loaded in {time.perf_counter() - started:.2f}s")
+                mark("backend loaded")
+            return self.scraper
+
+    def prewarm(self, event=None):
+        """
+        On the first keystroke, loads the backend and launches the browser in the
+        background, so the first search does not pay for either.
+        """
+        if self._prewarm_started:
+            return
+        self._prewarm_started = True
+
+        def warm():
+            try:
+                self.load_backend().prewarm().result()
+                logging.info(f"Browser ready {mark('browser ready'):.2f}s after start")
+            except Exception as e:
+                logging.warning(f"Pre-warm failed: {e}")
+
+        threading.Thread(target=warm, daemon=True).start()
 
     def on_closing(self):
+        try:
+            if self.task_queue is not None:
+                self.task_queue.cancel_all()
+            if self.scraper is not None:
+                self.scraper.close()
+        except Exception as e:
+            print(f"Error closing scraper: {e}")
         self.destroy()
 
     def start_search(self, event=None):
@@ -63,6 +128,7 @@ class SJRApp(ctk.CTk):
         
         self.status_label.configure(text=f"Searching for '{query}'...", text_color="blue")
         self.search_button.configure(state="disabled")
+        self._search_started = time.perf_counter()
         
         # Clear previous results
         for widget in self.results_frame.winfo_children():
@@ -73,7 +139,7 @@ class SJRApp(ctk.CTk):
 
     def run_search(self, query):
         try:
-            results = search_journal(query)
+            results = self.load_backend().search_journal(query)
             self.after(0, self.display_results, results)
         except Exception as e:
             self.after(0, self.status_label.configure, {"text": f"Error: {e}", "text_color": "red"})
@@ -85,7 +151,11 @@ class SJRApp(ctk.CTk):
             self.status_label.configure(text="No results found.", text_color="red")
             return
         
-        self.status_label.configure(text=f"Found {len(results)} results.", text_color="green")
+        elapsed = time.perf_counter() - self._search_started
+        self.status_label.configure(text=f"Found {len(results)} results in {elapsed:.1f}s.", text_color="green")
+        if not self._first_result:
+            self._first_result = True
+            logging.info(f"First result {mark('first result'):.2f}s after start (search took {elapsed:.2f}s)")
         
         for res in results:
             btn = ctk.CTkButton(
@@ -109,7 +179,7 @@ class SJRApp(ctk.CTk):
 
     def run_get_metrics(self, url):
         try:
-            metrics = get_journal_metrics(url)
+            metrics = self.load_backend().get_journal_metrics(url)
             self.after(0, self.display_metrics, metrics)
         except Exception as e:
             self.after(0, self.status_label.configure, {"text": f"Error: {e}", "text_color": "red"})
@@ -124,6 +194,8 @@ class SJRApp(ctk.CTk):
             f"Quartile: {metrics.get('Quartile', 'N/A')}",
             f"H-Index: {metrics.get('H-Index', 'N/A')}"
         ]
+        if metrics.get("Publisher"):
+            text_lines.append(f"Publisher: {metrics['Publisher']}")
         
         # Categories
         cats = metrics.get("Categories", [])
@@ -138,66 +210,136 @@ class SJRApp(ctk.CTk):
         self.current_metrics = metrics
         self.calc_button.configure(state="normal")
         
+    def get_task_queue(self):
+        """
+        Returns the background job queue, created with the scraper on first use.
+        Task updates are handed over to the Tk thread.
+        """
+        if self.task_queue is None:
+            from sjr_tasks import TaskQueue
+            self.task_queue = TaskQueue(self.load_backend(), max_workers=self.MAX_JOBS,
+                                        on_update=lambda task: self.after(0, self.update_job, task))
+        return self.task_queue
+
     def start_calculate(self):
         year = self.year_entry.get()
         if not self.current_metrics or not self.current_journal_title:
             return
-            
-        self.status_label.configure(text="Calculating percentiles... (Check browser for CAPTCHA)", text_color="blue")
-        self.calc_button.configure(state="disabled")
-        
-        threading.Thread(target=self.run_calculate, args=(self.current_journal_title, self.current_metrics, year), daemon=True).start()
-        
-    def run_calculate(self, title, metrics, year):
-        try:
+        title, metrics = self.current_journal_title, self.current_metrics
+        categories = metrics.get("Categories", [])
+
+        window = ResultsWindow(self, title, year, len(categories))
+
+        async def job():
+            from sjr_analytics import iter_percentiles_from_metrics_async
             logging.info(f"Starting calculation for {title}, year {year}")
-            results = calculate_percentiles_from_metrics(title, metrics, year)
-            logging.info(f"Calculation finished. Results found: {len(results) if results else 0}")
-            self.after(0, self.display_percentiles, results)
-        except Exception as e:
-            logging.exception("Error during calculation:")
-            self.after(0, self.status_label.configure, {"text": f"Error: {e}", "text_color": "red"})
-            self.after(0, self.calc_button.configure, {"state": "normal"})
-        
-    def display_percentiles(self, results):
-        self.calc_button.configure(state="normal")
-        self.status_label.configure(text="Calculation complete.", text_color="green")
-        
-        if not results:
-            return
-            
-        # Open new window
-        top = ctk.CTkToplevel(self)
-        top.title(f"Percentiles: {self.current_journal_title}")
-        top.geometry("700x400")
-        
-        # Simple scrollable frame for results
-        frame = ctk.CTkScrollableFrame(top)
-        frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        # Headers
-        headers = ["Category", "Type", "Rank", "Total", "Percentile"]
-        for i, h in enumerate(headers):
-            lbl = ctk.CTkLabel(frame, text=h, font=("Arial", 12, "bold"))
+            async for record in iter_percentiles_from_metrics_async(title, metrics, year,
+                                                                    scraper=self.scraper.async_scraper,
+                                                                    concurrency=self.JOB_CONCURRENCY):
+                self.after(0, window.add_record, record)
+
+        task = self.get_task_queue().submit(f"{title} ({year})", job)
+        window.task = task
+        self.job_windows[task.id] = window
+        self.update_job(task)
+
+    def update_job(self, task):
+        window = self.job_windows.get(task.id)
+        if window is not None:
+            window.update_task(task)
+        if task.finished:
+            self.job_windows.pop(task.id, None)
+            if task.status == "failed":
+                logging.error(f"Calculation failed for {task.name}: {task.error}")
+            else:
+                logging.info(f"Calculation {task.status} for {task.name}")
+
+        active = self.task_queue.active() if self.task_queue is not None else []
+        if active:
+            running = sum(1 for t in active if t.status == "running")
+            self.status_label.configure(text=f"Percentile jobs: {running} running, {len(active) - running} queued "
+                                             "(a browser window opens if a CAPTCHA needs solving)",
+                                        text_color="blue")
+        else:
+            self.status_label.configure(text="All percentile jobs finished.", text_color="green")
+
+class ResultsWindow(ctk.CTkToplevel):
+    """
+    Percentile table for one job. Rows are added as each category's record streams in;
+    the job can be cancelled from here, and closing the window cancels it too.
+    """
+    HEADERS = ["Category", "Type", "Rank", "Total", "Percentile"]
+
+    def __init__(self, master, journal_title, year, total):
+        super().__init__(master)
+        self.title(f"Percentiles: {journal_title} ({year})")
+        self.geometry("700x400")
+        self.task = None
+        self.total = total
+        self.finished_count = 0
+        self.matches = 0
+
+        bar = ctk.CTkFrame(self)
+        bar.pack(fill="x", padx=10, pady=(10, 0))
+        self.progress_label = ctk.CTkLabel(bar, text="Queued...", text_color="gray")
+        self.progress_label.pack(side="left", padx=10, pady=5)
+        self.cancel_button = ctk.CTkButton(bar, text="Cancel", width=80, command=self.cancel)
+        self.cancel_button.pack(side="right", padx=10, pady=5)
+
+        self.table = ctk.CTkScrollableFrame(self)
+        self.table.pack(fill="both", expand=True, padx=10, pady=10)
+        for i, h in enumerate(self.HEADERS):
+            lbl = ctk.CTkLabel(self.table, text=h, font=("Arial", 12, "bold"))
             lbl.grid(row=0, column=i, padx=5, pady=5, sticky="w")
-            
-        # Data
-        for idx, row in enumerate(results):
-            vals = [
-                row['Category'],
-                row['Type'],
-                str(row['Rank']),
-                str(row['Total Journals']),
-                f"{row['Percentile']}%"
-            ]
-            for i, v in enumerate(vals):
-                lbl = ctk.CTkLabel(frame, text=v)
-                lbl.grid(row=idx+1, column=i, padx=5, pady=2, sticky="w")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def on_close(self):
+        self.cancel()
+        self.destroy()
+
+    def add_record(self, record):
+        if not self.winfo_exists():
+            return
+        self.finished_count += 1
+        if record['Status'] == "ok":
+            self.matches += 1
+            vals = [record['Category'], record['Type'], str(record['Rank']), str(record['Total Journals']),
+                    f"{record['Percentile']}%"]
+            color = None
+        else:
+            vals = [record['Category'], record['Type'], "-", "-", record['Status'].replace("_", " ")]
+            color = "gray"
+        for i, v in enumerate(vals):
+            lbl = ctk.CTkLabel(self.table, text=v, text_color=color)
+            lbl.grid(row=self.finished_count, column=i, padx=5, pady=2, sticky="w")
+        self.progress_label.configure(text=f"{self.finished_count}/{self.total} categories done", text_color="blue")
+
+    def update_task(self, task):
+        if not self.winfo_exists():
+            return
+        if task.status == "queued":
+            self.progress_label.configure(text="Queued...", text_color="gray")
+        elif task.status == "running":
+            self.progress_label.configure(text=f"{self.finished_count}/{self.total} categories done",
+                                          text_color="blue")
+        elif task.status == "done":
+            self.progress_label.configure(text=f"Complete: found in {self.matches} of {self.total} categories.",
+                                          text_color="green")
+        elif task.status == "cancelled":
+            self.progress_label.configure(text="Cancelled.", text_color="orange")
+        else:
+            self.progress_label.configure(text=f"Error: {task.error}", text_color="red")
+        if task.finished:
+            self.cancel_button.configure(state="disabled")
 
 if __name__ == "__main__":
     import os
     import sys
-    import logging
     
     # Setup logging to file
     log_file = os.path.join(os.path.expanduser("~"), "sjr_gui.log")
@@ -0,0 +1,105 @@
+import weakref
+import threading
+import pandas as pd
+from sjr_export import issn_series, compact_rankings
+
+def clean_issn(s):
+    return str(s).replace('-', '').replace(' ', '')
+
+def normalize_title(s):
+    return str(s).lower().strip()
+
+class RankingIndex:
+    """
+    Lookup index over one ranking table.
+    Maps every ISSN of the table (packed or text, see issn_series) and every normalized title
+    to the position of the first row that carries it, so matching a journal is O(1).
+    """
+    def __init__(self, df):
+        positions = pd.RangeIndex(len(df))
+
+        issns = issn_series(df)
+        issns = issns[~issns.duplicated(keep='first')]
+        self.issn_to_pos = dict(zip(issns.to_numpy(), issns.index))
+
+        if 'Title' in df.columns:
+            titles = pd.Series(df['Title'].to_numpy(), index=positions).astype("string").str.lower().str.strip()
+            titles = titles[titles.notna() & ~titles.duplicated(keep='first')]
+            self.title_to_pos = dict(zip(titles.to_numpy(), titles.index))
+        else:
+            self.title_to_pos = {}
+
+    def find_by_issn(self, issns):
+        """
+        Returns the position of the first row matching any of the given ISSNs, or None.
+        """
+        hits = [self.issn_to_pos.get(clean_issn(i).upper()) for i in issns]
+        hits = [h for h in hits if h is not None]
+        return min(hits) if hits else None
+
+    def find_by_title(self, title):
+        return self.title_to_pos.get(normalize_title(title))
+
+    def find(self, issns, title):
+        """
+        ISSN match first, falling back to an exact (case-insensitive) title match.
+        """
+        pos = self.find_by_issn(issns) if issns else None
+        if pos is None and title:
+            pos = self.find_by_title(title)
+        return pos
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_ranking_index(df):
+    """
+    Returns the RankingIndex for df, building it on first use.
+    The index lives as long as the DataFrame object does.
+    """
+    key = id(df)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+
+    index = RankingIndex(df)
+
+    def _drop(_ref, key=key):
+        with _indexes_lock:
+            current = _indexes.get(key)
+            if current is not None and current[0] is _ref:
+                del _indexes[key]
+
+    with _indexes_lock:
+        _indexes[key] = (weakref.ref(df, _drop), index)
+    return index
+
+PERCENTILE_COLUMNS = ['Percentile', 'Total Journals', 'Category Quartile']
+
+def add_percentile_columns(df):
+    """
+    Adds per-row Percentile, Total Journals and Category Quartile columns in one vectorized pass.
+    Percentile is ((total - rank + 0.5) / total) * 100; Category Quartile is the journal's
+    quartile by rank within this table. Tables that already carry the columns are returned as is.
+    """
+    if all(c in df.columns for c in PERCENTILE_COLUMNS) or 'Rank' not in df.columns:
+        return df
+    total = len(df)
+    if total == 0:
+        return df.assign(**{'Percentile': pd.Series(dtype="float32"), 'Total Journals': pd.Series(dtype="Int32"),
+                            'Category Quartile': pd.Series(dtype="category")})
+    rank = pd.to_numeric(df['Rank'], errors='coerce')
+    quartile = ((rank * 4 - 1) // total + 1).clip(1, 4)
+    return df.assign(**{
+        'Percentile': (((total - rank + 0.5) / total) * 100).astype("float32"),
+        'Total Journals': pd.Series(total, index=df.index, dtype="Int32"),
+        'Category Quartile': ("Q" + quartile.astype("Int64").astype("string")).astype("category"),
+    })
+
+def prepare_ranking_table(df):
+    """
+    Brings a ranking table from any source (download, cache, snapshot) to the compact
+    schema with its percentile columns, so every consumer sees the same dtypes.
+    """
+    return add_percentile_columns(compact_rankings(df))
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import threading
+from sjr_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_PROFILE_PATH = os.path.join(DEFAULT_CACHE_DIR, "browser_state.json")
+
+# The cookie Cloudflare sets once a challenge is passed
+CLEARANCE_COOKIE = "cf_clearance"
+
+class BrowserProfile:
+    """
+    Playwright storage state (cookies and localStorage) persisted across runs, so a
+    Cloudflare clearance or consent cookie earned once is reused by later browsers.
+    The state expires when its clearance cookie does, and at the latest max_age
+    seconds after it was saved. needs_refresh() tells the scraper when to save
+    the live context's state again, so the file always holds recent cookies.
+    """
+    def __init__(self, path=None, max_age=24 * 3600, refresh_interval=600):
+        self.path = path or DEFAULT_PROFILE_PATH
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._saved_at = None
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                entry = json.load(f)
+            return entry["saved_at"], entry["state"]
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def expires_at(self, state, saved_at):
+        """
+        Epoch time at which a saved state stops being useful.
+        """
+        expiry = saved_at + self.max_age
+        for cookie in state.get("cookies", []):
+            if cookie.get("name") == CLEARANCE_COOKIE and cookie.get("expires", -1) > 0:
+                expiry = min(expiry, cookie["expires"])
+        return expiry
+
+    def load(self):
+        """
+        Returns the saved state for new_context(storage_state=...), or None if there is
+        none or it has expired. Cookies that have already expired are dropped.
+        """
+        with self._lock:
+            saved_at, state = self._read()
+            if state is None:
+                return None
+            now = time.time()
+            expires_at = self.expires_at(state, saved_at)
+            if now >= expires_at:
+                print("Saved browser state has expired; starting with a fresh profile.")
+                return None
+            self._saved_at = saved_at
+        state = dict(state)
+        state["cookies"] = [c for c in state.get("cookies", []) if c.get("expires", -1) <= 0 or c["expires"] > now]
+        print(f"Loaded saved browser state (valid for {(expires_at - now) / 60:.0f} more minutes).")
+        return state
+
+    def save(self, state):
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            now = time.time()
+            tmp_path = self.path + ".tmp"
+            # The state holds session cookies, so only the owner may read it
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"saved_at": now, "state": state}, f)
+            os.replace(tmp_path, self.path)
+            self._saved_at = now
+
+    def needs_refresh(self):
+        """
+        True if the live state has not been saved for refresh_interval seconds.
+        """
+        return self._saved_at is None or time.time() - self._saved_at >= self.refresh_interval
+
+_default_profile = None
+
+def get_default_profile():
+    """
+    Returns the shared process-wide BrowserProfile.
+    """
+    global _default_profile
+    if _default_profile is None:
+        _default_profile = BrowserProfile()
+    return _default_profile
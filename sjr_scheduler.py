@@ -0,0 +1,180 @@
+import time
+import random
+import asyncio
+
+def is_timeout(exc):
+    # Playwright's TimeoutError is not a subclass of the builtin one; match it by name
+    # so Playwright need not be imported here
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or type(exc).__name__ == "TimeoutError"
+
+def is_retryable(exc):
+    """
+    Timeouts and dropped connections are worth retrying; other errors are not.
+    """
+    if is_timeout(exc):
+        return True
+    message = str(exc)
+    return any(m in message for m in ("net::ERR_", "ECONNRESET", "ECONNREFUSED", "socket hang up"))
+
+class RequestScheduler:
+    """
+    Central gate for every navigation and download sent to Scimago.
+
+    - A token bucket caps the request rate (rate per second, bursts of up to burst).
+    - Concurrency adapts AIMD-style between min_concurrency and max_concurrency:
+      every success_window successes add one slot, every challenge or timeout halves it.
+    - The rate adapts the same way: it creeps up by rate_step per success window
+      up to max_rate, and halves on a challenge.
+    - A challenge (reported by the caller with record_challenge) also pauses all
+      requests for a cooldown; further reports during the cooldown are the same event.
+    - Retryable failures (timeouts, dropped connections) are retried up to
+      max_retries times with exponential backoff and full jitter.
+
+    asyncio primitives are created on first use, so the scheduler binds to the
+    event loop it is first used from.
+    """
+    def __init__(self, rate=1.0, burst=4, max_rate=4.0, min_rate=0.1, rate_step=0.1,
+                 min_concurrency=1, max_concurrency=4, success_window=5,
+                 max_retries=3, base_delay=2.0, max_delay=60.0, challenge_cooldown=30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max(max_rate, rate)
+        self.min_rate = min(min_rate, rate)
+        self.rate_step = rate_step
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, min_concurrency)
+        # Start low and let successes raise it towards max_concurrency
+        self.concurrency = min(self.max_concurrency, max(min_concurrency, 2))
+        self.success_window = success_window
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.challenge_cooldown = challenge_cooldown
+
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._streak = 0
+        self._cond = None
+        self._bucket_lock = None
+
+        self.requests = 0
+        self.retries = 0
+        self.challenges = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def _primitives(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+            self._bucket_lock = asyncio.Lock()
+        return self._cond
+
+    # --- token bucket ---
+
+    async def _take_token(self):
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+                self._refilled = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    # --- adaptive concurrency ---
+
+    async def _enter(self):
+        cond = self._primitives()
+        async with cond:
+            while self._in_flight >= self.concurrency:
+                await cond.wait()
+            self._in_flight += 1
+
+    async def _leave(self):
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def record_success(self):
+        self.requests += 1
+        self._streak += 1
+        if self._streak >= self.success_window:
+            self._streak = 0
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+
+    def record_timeout(self):
+        self.timeouts += 1
+        self._streak = 0
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+
+    def record_challenge(self):
+        """
+        Backs off after a challenge: halves concurrency and rate and pauses all requests.
+        Reports arriving during the resulting pause (other pages hitting the same
+        challenge) count as the same event and do not back off again.
+        """
+        self._streak = 0
+        if time.monotonic() < self._paused_until:
+            return
+        self.challenges += 1
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, time.monotonic() + self.challenge_cooldown)
+        print(f"Challenge detected; slowing down to {self.rate:.2f} req/s, "
+              f"{self.concurrency} concurrent, pausing {self.challenge_cooldown:.0f}s.")
+
+    def backoff_delay(self, attempt):
+        """
+        Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)].
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def run(self, kind, make_call, retries=None):
+        """
+        Runs make_call() (which returns an awaitable) once a token and a slot are free.
+        Retryable failures are retried with backoff; the last error is re-raised.
+        """
+        self._primitives()
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            await self._take_token()
+            await self._enter()
+            try:
+                result = await make_call()
+            except Exception as e:
+                if is_timeout(e):
+                    self.record_timeout()
+                if not is_retryable(e) or attempt >= retries:
+                    self.failures += 1
+                    raise
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                self.retries += 1
+                print(f"{kind} failed ({type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}); "
+                      f"retry {attempt}/{retries} in {delay:.1f}s")
+            else:
+                self.record_success()
+                return result
+            finally:
+                await self._leave()
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "challenges": self.challenges,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "rate": round(self.rate, 3),
+            "concurrency": self.concurrency,
+        }
@@ -1,277 +1,974 @@
-import re
 import os
-import pandas as pd
+import re
+import asyncio
+import threading
+from urllib.parse import urlparse
 from datetime import datetime
-from playwright.sync_api import sync_playwright
+from sjr_cache import source_id, get_default_metrics_cache
+from sjr_search import get_default_search_index, start_default_search_index
+from sjr_export import parse_rankings_export
+from sjr_trace import span
+from sjr_scheduler import RequestScheduler
+from sjr_profile import get_default_profile
+
+# Overridable (e.g. to point at the local fixture server in sjr_fixtures) with SJR_BASE_URL or base_url=
+DEFAULT_BASE_URL = os.environ.get("SJR_BASE_URL", "https://www.scimagojr.com")
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+AD_FRAME_MARKERS = ("google_ads", "aswift")
+AD_CLOSE_SELECTOR = "#dismiss-button, [aria-label='Close ad'], div[aria-label='Close ad']"
+CHALLENGE_URL_MARKERS = ("cloudflare", "turnstile")
+CHALLENGE_SELECTOR = "input[type='checkbox'], .ctp-checkbox-label"
+
+class InterstitialWatcher:
+    """
+    Watches a page for interstitials (Google vignette ads, Cloudflare challenges).
+    Once attached, every frame attach/navigate/detach event triggers a check, so
+    overlays are dismissed as soon as they appear instead of at fixed points.
+    wait_clear() resolves when no interstitial is showing.
+    """
+    # While an interstitial stays visible, how often to look again (seconds)
+    RECHECK_INTERVAL = 0.5
+
+    def __init__(self, page):
+        self.page = page
+        self.challenge_seen = False
+        # Set by the scraper once it has reacted to this page's challenge
+        self.challenge_reported = False
+        self.clearance_saved = False
+        self._clear = asyncio.Event()
+        self._clear.set()
+        self._task = None
+        self._rerun = False
+        self._attached = False
+
+    def attach(self):
+        for event in ("frameattached", "framenavigated", "framedetached"):
+            self.page.on(event, self._on_frame_event)
+        self._attached = True
+        return self
+
+    def detach(self):
+        if self._attached:
+            for event in ("frameattached", "framenavigated", "framedetached"):
+                self.page.remove_listener(event, self._on_frame_event)
+            self._attached = False
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def _on_frame_event(self, frame=None):
+        # Not clear until the scheduled check has looked at the new state
+        self._clear.clear()
+        if self._task is not None and not self._task.done():
+            self._rerun = True
+            return
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            self._rerun = False
+            try:
+                active = await self.check()
+            except Exception as e:
+                print(f"Error handling interstitials: {e}")
+                active = False
+            if self._rerun:
+                continue
+            if not active:
+                return
+            await asyncio.sleep(self.RECHECK_INTERVAL)
+
+    @staticmethod
+    async def _frame_visible(frame):
+        try:
+            element = await frame.frame_element()
+            return await element.is_visible()
+        except Exception:
+            return False
+
+    async def check(self):
+        """
+        One pass over the page: dismisses visible vignette ads, clicks Cloudflare
+        checkboxes and updates the clear state. Returns True if an interstitial is still showing.
+        """
+        active = False
+        for frame in list(self.page.frames):
+            if frame == self.page.main_frame:
+                continue
+            if any(m in frame.name for m in AD_FRAME_MARKERS):
+                # Ordinary banner ads use the same frame names; only a frame with a
+                # visible dismiss control is a vignette
+                close_btn = frame.locator(AD_CLOSE_SELECTOR).first
+                try:
+                    if not (await close_btn.count() > 0 and await close_btn.is_visible()):
+                        continue
+                    print("Found Google Vignette ad. Closing...")
+                    await close_btn.click(timeout=5000)
+                    active = active or (await close_btn.count() > 0 and await close_btn.is_visible())
+                except Exception as e:
+                    print(f"Error handling ads: {e}")
+            elif any(m in frame.url for m in CHALLENGE_URL_MARKERS):
+                if not await self._frame_visible(frame):
+                    continue
+                active = True
+                if not self.challenge_seen:
+                    print("Found Cloudflare challenge. Attempting to click...")
+                self.challenge_seen = True
+                try:
+                    await frame.locator(CHALLENGE_SELECTOR).first.click(timeout=5000)
+                except Exception:
+                    pass
+
+        # Full-page Cloudflare challenge ("Just a moment...")
+        try:
+            if "just a moment" in (await self.page.title()).lower():
+                self.challenge_seen = True
+                active = True
+        except Exception:
+            pass
 
-def handle_interstitials(page):
+        if active:
+            self._clear.clear()
+        else:
+            self._clear.set()
+        return active
+
+    @property
+    def is_clear(self):
+        return self._clear.is_set()
+
+    async def wait_clear(self, timeout=15):
+        """
+        Waits until no interstitial is showing. Returns False on timeout.
+        """
+        if self._task is None or self._task.done():
+            self._on_frame_event()
+        try:
+            await asyncio.wait_for(self._clear.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+async def handle_interstitials(page):
     """
     Checks for and handles interstitials like Cloudflare challenges and Ad overlays.
     """
-    # 1. Google Vignette Ads
-    try:
-        for frame in page.frames:
-             if "google_ads" in frame.name or "aswift" in frame.name:
-                 close_btn = frame.locator("#dismiss-button, [aria-label='Close ad'], div[aria-label='Close ad']").first
-                 if close_btn.count() > 0 and close_btn.is_visible():
-                     print("Found Google Vignette ad. Closing...")
-                     close_btn.click()
-                     page.wait_for_timeout(1000) 
-                     return 
-    except Exception as e:
-        print(f"Error handling ads: {e}")
-
-    # 2. Cloudflare
-    try:
-        cf_frames = [f for f in page.frames if "cloudflare" in f.url or "turnstile" in f.url]
-        for frame in cf_frames:
-             checkbox = frame.locator("input[type='checkbox'], .ctp-checkbox-label").first
-             if checkbox.count() > 0 and checkbox.is_visible():
-                 print("Found Cloudflare challenge. Attempting to click...")
-                 checkbox.click()
-                 page.wait_for_timeout(2000)
-                 return
-    except Exception as e:
-        print(f"Error handling Cloudflare: {e}")
+    await InterstitialWatcher(page).check()
 
-def search_journal(query):
+def read_rankings_file(path):
     """
-    Searches for a journal on Scimago and returns a list of results.
-    Returns a list of dicts: {'title': str, 'url': str}
+    Parses a downloaded ranking export into a DataFrame.
+    Accepts a file path or the raw bytes of the export.
+    """
+    if isinstance(path, (bytes, bytearray)):
+        data = bytes(path)
+    else:
+        with open(path, "rb") as f:
+            data = f.read()
+    with span("parse", bytes=len(data)):
+        return parse_rankings_export(data)
+
+def looks_like_challenge(body):
+    """
+    True if an HTTP response body is an HTML page (Cloudflare challenge, error page)
+    rather than a spreadsheet export.
+    """
+    head = body[:2048].lstrip().lower()
+    return head.startswith(b"<") or b"<html" in head or b"just a moment" in head
+
+def parse_category_links(links_data):
+    """
+    Turns [{'text', 'href'}] links into [{'name', 'type', 'id'}] subject area/category entries.
+    Category links are checked first, since on ranking pages they also carry area=.
+    """
+    categories = []
+    for link in links_data:
+        text = link['text']
+        href = link['href']
+        cat_match = re.search(r'category=(\d+)', href)
+        if cat_match:
+            categories.append({"name": text, "type": "Category", "id": cat_match.group(1)})
+            continue
+        area_match = re.search(r'area=(\d+)', href)
+        if area_match:
+            categories.append({"name": text, "type": "Subject Area", "id": area_match.group(1)})
+            continue
+    return categories
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+BLOCKED_DOMAINS = {
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com", "fundingchoicesmessages.google.com",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net", "pubmatic.com", "rubiconproject.com",
+    "casalemedia.com", "openx.net", "taboola.com", "outbrain.com", "scorecardresearch.com", "quantserve.com",
+    "facebook.net", "hotjar.com",
+}
+
+# Never blocked: Cloudflare challenges must load for clearance to work
+ALLOWED_DOMAINS = {"challenges.cloudflare.com"}
+
+EXTRACT_METRICS_JS = r"""
+() => {
+    const text = el => (el ? el.textContent.trim() : null);
+    const section = title => {
+        const h2 = Array.from(document.querySelectorAll('h2')).find(h => h.textContent.includes(title));
+        return h2 ? h2.parentElement : null;
+    };
+
+    const sjrEl = document.querySelector('.content-hindex span.hsjr') || document.querySelector('.sjrnumber');
+    const quartileEl = document.querySelector(".content-hindex .hindexnumber span[class^='Q']");
+    const hBox = Array.from(document.querySelectorAll('.cuadrado')).find(b => b.textContent.includes('H-Index'));
+
+    const issnSection = section('ISSN');
+    const issns = issnSection ? (issnSection.textContent.match(/\b\d{7}[\dX]\b/g) || []) : [];
+
+    const publisherSection = section('Publisher');
+    let publisher = null;
+    if (publisherSection) {
+        const h2 = publisherSection.querySelector('h2');
+        publisher = publisherSection.textContent.replace(h2 ? h2.textContent : '', '').trim() || null;
+    }
+
+    const categorySection = section('Subject Area and Category');
+    const categoryLinks = categorySection
+        ? Array.from(categorySection.querySelectorAll('a')).map(a => ({text: a.textContent.trim(), href: a.href}))
+        : [];
+
+    // Chart data tables: "Year | SJR" and "Category | Year | Quartile"
+    const sjrHistory = [];
+    const quartileHistory = [];
+    for (const table of document.querySelectorAll('table')) {
+        const headers = Array.from(table.querySelectorAll('thead th, tr:first-child th')).map(th => th.textContent.trim());
+        const rows = Array.from(table.querySelectorAll('tbody tr')).map(
+            tr => Array.from(tr.querySelectorAll('td')).map(td => td.textContent.trim()));
+        if (headers.length === 2 && headers[0] === 'Year' && headers[1] === 'SJR') {
+            for (const r of rows) if (r.length === 2) sjrHistory.push({Year: r[0], SJR: r[1]});
+        } else if (headers.length === 3 && headers[0] === 'Category' && headers[1] === 'Year' && headers[2] === 'Quartile') {
+            for (const r of rows) if (r.length === 3) quartileHistory.push({Category: r[0], Year: r[1], Quartile: r[2]});
+        }
+    }
+
+    return {
+        sjr: text(sjrEl),
+        quartile: text(quartileEl),
+        hIndex: hBox ? text(hBox.querySelector('.hindexnumber')) : null,
+        issns: Array.from(new Set(issns)),
+        publisher,
+        categoryLinks,
+        sjrHistory,
+        quartileHistory
+    };
+}
+"""
+
+class ResourceFilter:
+    """
+    Decides which requests a scraper context aborts.
+    Requests to allowed domains always pass; otherwise requests of a blocked
+    resource type or to a blocked (ad/analytics) domain or any of its subdomains are aborted.
+    """
+    def __init__(self, resource_types=None, deny_domains=None, allow_domains=None):
+        self.resource_types = set(BLOCKED_RESOURCE_TYPES if resource_types is None else resource_types)
+        self.deny_domains = set(BLOCKED_DOMAINS if deny_domains is None else deny_domains)
+        self.allow_domains = set(ALLOWED_DOMAINS if allow_domains is None else allow_domains)
+        self.blocked = 0
+
+    @staticmethod
+    def _matches(host, domains):
+        parts = host.split(".")
+        return any(".".join(parts[i:]) in domains for i in range(len(parts)))
+
+    def should_block(self, url, resource_type):
+        host = urlparse(url).hostname or ""
+        if self._matches(host, self.allow_domains):
+            return False
+        return resource_type in self.resource_types or self._matches(host, self.deny_domains)
+
+    async def handle(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+class AsyncSJRScraper:
+    """
+    asyncio scraper session built on playwright.async_api.
+    Keeps one Chromium browser and context alive; every operation runs in its own
+    page, so many searches, metric lookups and downloads can overlap on one event loop.
+    max_pages caps how many pages are open at once across all callers.
+    With http_fast_path, ranking exports are fetched over plain HTTP using the
+    context's cookies and user agent, falling back to the rendered page on a challenge.
+    metrics_cache is a MetricsCache, True for the shared default, or None/False to disable;
+    search_index works the same way for the local JournalSearchIndex; the shared one
+    is built in the background, and searches go online until it is ready.
+    block_resources (True or a ResourceFilter) aborts images, fonts, media and
+    ad/analytics requests, which also keeps most vignette ads from appearing.
+    base_url is the site root (DEFAULT_BASE_URL unless given).
+    Every navigation and download goes through scheduler, a RequestScheduler
+    (True for one sized to max_pages, None/False to send requests unthrottled).
+    storage_state is a BrowserProfile (True for the shared default, None/False for an
+    empty context each run): cookies and localStorage are loaded from it at launch
+    and saved back after a challenge is passed, periodically, and on close.
+    The browser is headless by default. With escalate, a challenge a headless page
+    cannot pass is reopened in a temporary headed browser (where it clears or the
+    user solves it) and the resulting clearance is copied back into the headless context.
     """
-    results_data = []
-    print(f"Searching for: {query}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = context.new_page()
-        
+    # How long a headed escalation waits for its challenge to be solved (seconds)
+    ESCALATION_TIMEOUT = 300
+
+    def __init__(self, headless=True, max_pages=4, http_fast_path=True, metrics_cache=True, search_index=True,
+                 block_resources=False, base_url=None, scheduler=True, storage_state=True, escalate=True):
+        self.headless = headless
+        self.escalate = escalate
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        if scheduler is True:
+            scheduler = RequestScheduler(max_concurrency=max_pages)
+        self.scheduler = scheduler or None
+        if storage_state is True:
+            storage_state = get_default_profile()
+        self.profile = storage_state or None
+        self.max_pages = max_pages
+        self.http_fast_path = http_fast_path
+        if metrics_cache is True:
+            metrics_cache = get_default_metrics_cache()
+        self.metrics_cache = metrics_cache or None
+        # The shared index is built in the background from the first search or prewarm,
+        # since it reads every local ranking table
+        self.search_index = search_index or None
+        if block_resources is True:
+            block_resources = ResourceFilter()
+        self.resource_filter = block_resources or None
+        # Set when the HTTP path hit a challenge; cleared once the browser passes one
+        self._http_blocked = False
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._start_lock = None
+        self._page_slots = None
+        self._watchers = {}
+        self._escalation_lock = None
+        self._escalations = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """
+        Launches the browser and context if they are not running yet.
+        """
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.context is not None:
+                return
+            # Imported on first launch: Playwright is not needed until a browser is
+            from playwright.async_api import async_playwright
+
+            state = await asyncio.to_thread(self.profile.load) if self.profile is not None else None
+            async with span("browser.launch", headless=self.headless):
+                try:
+                    self._playwright = await async_playwright().start()
+                    self.browser = await self._playwright.chromium.launch(headless=self.headless)
+                    self.context = await self.browser.new_context(
+                        accept_downloads=True,
+                        user_agent=USER_AGENT,
+                        storage_state=state
+                    )
+                    if self.resource_filter is not None:
+                        await self.context.route("**/*", self.resource_filter.handle)
+                except BaseException:
+                    # Leave nothing half-started, so the next call can launch again
+                    self.context = None
+                    await self.close()
+                    raise
+
+    async def prewarm(self):
+        """
+        Launches the browser, and starts building the local search index, ahead of the first operation.
+        A failure is only reported; the launch is retried on first use.
+        """
+        if self.search_index is True:
+            start_default_search_index()
+        try:
+            async with span("prewarm"):
+                await self.start()
+        except Exception as e:
+            print(f"Browser pre-warm failed: {e}")
+
+    async def close(self):
+        """
+        Closes the browser and stops Playwright.
+        """
+        if self.scheduler is not None and (self.scheduler.retries or self.scheduler.challenges):
+            print(f"Request scheduler: {self.scheduler.stats()}")
+        await self.save_storage_state()
+        try:
+            if self.browser is not None:
+                await self.browser.close()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
+        finally:
+            self.browser = None
+            self.context = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _acquire_page(self):
+        if self._page_slots is None:
+            self._page_slots = asyncio.Semaphore(self.max_pages)
+        await self._page_slots.acquire()
+        try:
+            await self.start()
+            page = await self.context.new_page()
+        except BaseException:
+            self._page_slots.release()
+            raise
+        self._watchers[page] = InterstitialWatcher(page).attach()
+        return page
+
+    async def _wait_clear(self, page, timeout=15):
+        """
+        Waits for the page's interstitial watcher to report the page clear.
+        The first challenge seen on a page makes the scheduler back off; one a
+        headless page cannot pass is escalated to a headed browser and the page reloaded.
+        """
+        watcher = self._watchers.get(page)
+        if watcher is None:
+            return
+        async with span("interstitials"):
+            clear = await watcher.wait_clear(timeout)
+        if watcher.challenge_seen and not watcher.challenge_reported:
+            watcher.challenge_reported = True
+            if self.scheduler is not None:
+                self.scheduler.record_challenge()
+        if not clear and watcher.challenge_seen and self.headless and self.escalate:
+            url = page.url
+            if await self._escalate(url):
+                await self._goto(page, url)
+                clear = await watcher.wait_clear(timeout)
+        if not clear:
+            print("Interstitial still showing; continuing anyway.")
+        if watcher.challenge_seen and watcher.is_clear and not watcher.clearance_saved:
+            # Keep the clearance just earned for the next run
+            watcher.clearance_saved = True
+            await self.save_storage_state()
+
+    async def _escalate(self, url):
+        """
+        Opens url in a temporary headed browser sharing this context's state, waits for
+        its challenge to clear (automatically or solved by the user), then copies the
+        cookies back into the headless context and the profile.
+        One escalation runs at a time; jobs that queued behind it reuse its clearance.
+        Returns True if the headless pages should retry.
+        """
+        if self._escalation_lock is None:
+            self._escalation_lock = asyncio.Lock()
+        seen = self._escalations
+        async with self._escalation_lock:
+            if self._escalations != seen:
+                return True
+
+            print(f"Challenge not passed headless; opening a visible browser for {url}")
+            browser = None
+            try:
+                async with span("escalate", url=url):
+                    browser = await self._playwright.chromium.launch(headless=False)
+                    context = await browser.new_context(
+                        accept_downloads=True,
+                        user_agent=USER_AGENT,
+                        storage_state=await self.context.storage_state()
+                    )
+                    page = await context.new_page()
+                    watcher = InterstitialWatcher(page).attach()
+                    # Not through the scheduler: it is paused after the challenge this request must clear
+                    await page.goto(url, timeout=60000)
+                    print(f"Solve the challenge in the browser window if asked "
+                          f"(waiting up to {self.ESCALATION_TIMEOUT // 60} minutes)...")
+                    cleared = await watcher.wait_clear(self.ESCALATION_TIMEOUT)
+                    watcher.detach()
+                    if not cleared:
+                        print("Challenge was not solved in time.")
+                        return False
+                    state = await context.storage_state()
+                    await self.context.add_cookies(state["cookies"])
+            except Exception as e:
+                print(f"Could not escalate to a headed browser: {e}")
+                return False
+            finally:
+                if browser is not None:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+
+            self._escalations += 1
+            self._http_blocked = False
+            print("Clearance handed back to the headless browser.")
+            if self.profile is not None:
+                await asyncio.to_thread(self.profile.save, state)
+            return True
+
+    async def save_storage_state(self):
+        """
+        Writes the context's cookies and localStorage to the profile.
+        """
+        if self.profile is None or self.context is None:
+            return
+        try:
+            state = await self.context.storage_state()
+            await asyncio.to_thread(self.profile.save, state)
+        except Exception as e:
+            print(f"Error saving browser state: {e}")
+
+    async def _request(self, kind, make_call, retries=None):
+        """
+        Sends one navigation or download through the request scheduler.
+        """
+        if self.scheduler is None:
+            return await make_call()
+        return await self.scheduler.run(kind, make_call, retries=retries)
+
+    async def _goto(self, page, url, timeout=60000):
+        async with span("goto", url=url):
+            return await self._request("goto", lambda: page.goto(url, timeout=timeout))
+
+    async def _release_page(self, page):
+        watcher = self._watchers.pop(page, None)
+        if watcher is not None:
+            watcher.detach()
+        try:
+            await page.close()
+        except Exception:
+            pass
+        finally:
+            self._page_slots.release()
+        if self.profile is not None and self.profile.needs_refresh():
+            await self.save_storage_state()
+
+    async def _local_search_index(self):
+        """
+        Returns the local search index, or None while the shared one is still being built.
+        """
+        if self.search_index is True:
+            index = get_default_search_index(wait=False)
+            if index is None:
+                return None
+            self.search_index = index
+        return self.search_index
+
+    async def search_journal(self, query, local=True):
+        """
+        Searches for a journal on Scimago and returns a list of results.
+        Returns a list of dicts: {'title': str, 'url': str}
+        An exact ISSN or title hit in the local search index is returned without touching the network.
+        """
+        index = await self._local_search_index() if local else None
+        if index:
+            local_results, confident = index.search(query)
+            if confident:
+                print(f"Found '{query}' in the local search index.")
+                return local_results
+
+        results_data = []
+        print(f"Searching for: {query}")
+
+        page = await self._acquire_page()
         try:
-            page.goto("https://www.scimagojr.com/")
-            handle_interstitials(page)
-            
+            await self._goto(page, f"{self.base_url}/")
+            await self._wait_clear(page)
+
             # Search Input
             try:
-                page.locator("#searchinput").wait_for(timeout=5000)
-            except:
-                print("Search input not found.")
+                async with span("wait_for_selector", selector="#searchinput"):
+                    await page.locator("#searchinput").wait_for(timeout=5000)
+            except Exception as e:
+                print(f"Search input not found: {e}")
                 return []
 
-            page.locator("#searchinput").fill(query)
-            page.keyboard.press("Enter")
-            
+            await page.locator("#searchinput").fill(query)
+            await page.keyboard.press("Enter")
+
             # Wait for results
             try:
-                page.wait_for_url("**/journalsearch.php?q=*", timeout=30000)
-            except:
+                async with span("wait_for_url", url="journalsearch.php"):
+                    await page.wait_for_url("**/journalsearch.php?q=*", timeout=30000)
+            except Exception:
                 print("Timeout waiting for search results URL.")
-                pass
-            
-            handle_interstitials(page)
+
+            await self._wait_clear(page)
 
             # Extract results
-            result_elements = page.locator("div.search_results > a").all()
+            result_elements = await page.locator("div.search_results > a").all()
             if not result_elements:
-                 result_elements = page.locator("a[href^='journalsearch.php?q=']").all()
+                 result_elements = await page.locator("a[href^='journalsearch.php?q=']").all()
 
             for res in result_elements:
-                text = res.inner_text().strip()
-                href = res.get_attribute("href")
+                text = (await res.inner_text()).strip()
+                href = await res.get_attribute("href")
                 if text and href:
                     title = text.split('\n')[0].strip()
                     results_data.append({"title": title, "url": href})
-                    
+
         except Exception as e:
             print(f"Error during search: {e}")
         finally:
-            browser.close()
-            
-    return results_data
+            await self._release_page(page)
 
-def get_journal_metrics(url_suffix):
-    """
-    Navigates to the journal detail page and extracts metrics.
-    """
-    metrics = {"H-Index": "N/A", "SJR": "N/A", "Quartile": "N/A"}
-    
-    if url_suffix.startswith("http"):
-        full_url = url_suffix
-    else:
-        if url_suffix.startswith("/"):
-            full_url = f"https://www.scimagojr.com{url_suffix}"
+        return results_data
+
+    async def get_journal_metrics(self, url_suffix, refresh=False):
+        """
+        Returns the journal's metrics, from the metrics cache when possible.
+        Entries are keyed by the q=<sid> source id in the URL; refresh=True forces a re-scrape.
+        """
+        sid = source_id(url_suffix)
+        if self.metrics_cache is not None and sid is not None and not refresh:
+            cached = await asyncio.to_thread(self.metrics_cache.get, sid)
+            if cached is not None:
+                print(f"Using cached metrics for source {sid}")
+                return cached
+
+        metrics = await self._scrape_journal_metrics(url_suffix)
+
+        # Only cache complete extractions, so a failed page load is retried next time
+        if self.metrics_cache is not None and sid is not None and metrics.get("Categories"):
+            await asyncio.to_thread(self.metrics_cache.put, sid, metrics)
+        return metrics
+
+    async def _scrape_journal_metrics(self, url_suffix):
+        """
+        Navigates to the journal detail page and extracts metrics: SJR, quartile, H-index,
+        ISSNs, categories, publisher and the per-year SJR and quartile history.
+        """
+        metrics = {"H-Index": "N/A", "SJR": "N/A", "Quartile": "N/A"}
+
+        if url_suffix.startswith("http"):
+            full_url = url_suffix
         else:
-            full_url = f"https://www.scimagojr.com/{url_suffix}"
-            
-    print(f"Navigating to {full_url}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = context.new_page()
-        
+            if url_suffix.startswith("/"):
+                full_url = f"{self.base_url}{url_suffix}"
+            else:
+                full_url = f"{self.base_url}/{url_suffix}"
+
+        print(f"Navigating to {full_url}")
+
+        page = await self._acquire_page()
         try:
-            page.goto(full_url, timeout=60000)
-            handle_interstitials(page)
-            
+            await self._goto(page, full_url)
+            await self._wait_clear(page)
+
             # Wait/Check H-index
             try:
-                page.wait_for_selector(".hindexnumber", timeout=30000)
-            except:
-                pass
-            
-            handle_interstitials(page)
+                async with span("wait_for_selector", selector=".hindexnumber"):
+                    await page.wait_for_selector(".hindexnumber", timeout=30000)
+            except Exception:
+                print("H-index not found on the page; extracting what is there.")
 
-            try:
-                # SJR
-                sjr_el = page.locator(".content-hindex span.hsjr").first
-                if sjr_el.count() > 0:
-                    metrics["SJR"] = sjr_el.inner_text()
-                else:
-                    sjr_el = page.locator(".sjrnumber").first
-                    if sjr_el.count() > 0:
-                         metrics["SJR"] = sjr_el.inner_text()
-            except: pass
+            await self._wait_clear(page)
 
+            # Everything is read by one in-page script: a single round trip to the browser
             try:
-                # Quartile
-                q_loc = page.locator(".content-hindex .hindexnumber span[class^='Q']").first
-                if q_loc.count() > 0:
-                    metrics["Quartile"] = q_loc.inner_text()
-            except: pass
+                async with span("extract"):
+                    data = await page.evaluate(EXTRACT_METRICS_JS)
+            except Exception as e:
+                print(f"Error extracting metrics: {e}")
+                data = None
 
-            try:
-                # H-Index
-                h_box = page.locator(".cuadrado", has_text="H-Index").first
-                if h_box.count() > 0:
-                    h_index_el = h_box.locator(".hindexnumber").first
-                    if h_index_el.count() > 0:
-                         metrics["H-Index"] = h_index_el.inner_text()
-            except: pass
-            
-            try:
-                # ISSN
-                issn_el = page.get_by_text(re.compile(r"ISSN"), exact=False).first
-                if issn_el.count() > 0:
-                    text_content = issn_el.inner_text()
-                    issn_matches = re.findall(r"\d{8}", text_content)
-                    if issn_matches:
-                         metrics["ISSN"] = issn_matches
-            except: pass
+            if data:
+                for key, field in (("SJR", "sjr"), ("Quartile", "quartile"), ("H-Index", "hIndex")):
+                    if data.get(field):
+                        metrics[key] = data[field]
+                if data.get("issns"):
+                    metrics["ISSN"] = data["issns"]
+                if data.get("publisher"):
+                    metrics["Publisher"] = data["publisher"]
+                metrics["Categories"] = parse_category_links(data.get("categoryLinks", []))
+                metrics["SJR History"] = data.get("sjrHistory", [])
+                metrics["Quartile History"] = data.get("quartileHistory", [])
 
-            try:
-                # Categories
-                links_data = page.evaluate("""
-                    () => {
-                        const h2s = Array.from(document.querySelectorAll('h2'));
-                        const targetH2 = h2s.find(h => h.textContent.includes('Subject Area and Category'));
-                        
-                        if (!targetH2) return [];
-                        const container = targetH2.parentElement;
-                        if (!container) return [];
-
-                        const links = container.querySelectorAll('a');
-                        return Array.from(links).map(link => ({
-                            text: link.textContent.trim(),
-                            href: link.href
-                        }));
-                    }
-                """)
-                
-                categories = []
-                for link in links_data:
-                    text = link['text']
-                    href = link['href']
-                    area_match = re.search(r'area=(\d+)', href)
-                    if area_match:
-                        categories.append({"name": text, "type": "Subject Area", "id": area_match.group(1)})
-                        continue
-                    cat_match = re.search(r'category=(\d+)', href)
-                    if cat_match:
-                        categories.append({"name": text, "type": "Category", "id": cat_match.group(1)})
-                        continue
-                
-                metrics["Categories"] = categories
-            except Exception as e:
-                print(f"Error extracting categories: {e}")
-                
         except Exception as e:
             print(f"Error getting metrics: {e}")
         finally:
-            browser.close()
-            
-    return metrics
+            await self._release_page(page)
 
-def download_journal_rankings(year, id_value, type_str):
-    """
-    Downloads the journal ranking Excel file.
-    """
-    if type_str not in ['area', 'category']:
-        raise ValueError("type_str must be 'area' or 'category'")
-        
-    page_url = f"https://www.scimagojr.com/journalrank.php?{type_str}={id_value}&year={year}"
-    print(f"Navigating to rankings: {page_url}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            accept_downloads=True,
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = context.new_page()
-        
+        return metrics
+
+    async def _ranking_links(self, page_url):
+        """
+        Returns the subject area/category links of a ranking page, or [] if it could not be read.
+        """
+        page = await self._acquire_page()
+        try:
+            await self._goto(page, page_url)
+            await self._wait_clear(page)
+            try:
+                async with span("wait_for_selector", selector="a[href*='journalrank.php?']"):
+                    await page.wait_for_selector("a[href*='journalrank.php?']", timeout=60000)
+            except Exception:
+                print(f"No ranking links found on {page_url}")
+                return []
+            links_data = await page.evaluate("""
+                () => Array.from(document.querySelectorAll("a[href*='journalrank.php?']")).map(a => ({
+                    text: a.textContent.trim(),
+                    href: a.href
+                }))
+            """)
+            return parse_category_links(links_data)
+        except Exception as e:
+            print(f"Error reading ranking links from {page_url}: {e}")
+            return []
+        finally:
+            await self._release_page(page)
+
+    async def list_ranking_tables(self, year):
+        """
+        Enumerates every subject area and category ranking table for a year.
+        Areas come from the ranking page's area menu; categories from each area's page.
+        Returns a list of {'name', 'type', 'id'} dicts without duplicates, or [] if the
+        area menu or any area's page could not be read, since a partial list would be
+        stored as the year's plan.
+        """
+        base_url = f"{self.base_url}/journalrank.php?year={year}"
+        print(f"Enumerating subject areas: {base_url}")
+        entries = await self._ranking_links(base_url)
+        areas = {e['id']: e for e in entries if e['type'] == 'Subject Area'}
+        categories = {e['id']: e for e in entries if e['type'] == 'Category'}
+        if not areas:
+            print("No subject areas found.")
+            return []
+
+        area_pages = await asyncio.gather(*(self._ranking_links(f"{base_url}&area={area_id}") for area_id in areas))
+        missing = []
+        for area_id, entries in zip(areas, area_pages):
+            area_categories = [e for e in entries if e['type'] == 'Category']
+            if not area_categories:
+                missing.append(areas[area_id]['name'])
+            for e in area_categories:
+                categories.setdefault(e['id'], e)
+        if missing:
+            print(f"No categories found for {len(missing)} subject areas ({', '.join(missing)}); "
+                  f"enumeration is incomplete.")
+            return []
+
+        print(f"Found {len(areas)} subject areas and {len(categories)} categories.")
+        return list(areas.values()) + list(categories.values())
+
+    async def _fetch_export_http(self, export_url):
+        """
+        Fetches a ranking export through the context's HTTP client, without rendering a page.
+        The request shares the browser's cookie jar (including any Cloudflare clearance)
+        and user agent, and reuses its connections.
+        Returns a DataFrame, or None if the response was not a spreadsheet.
+        """
+        await self.start()
+
+        async def fetch():
+            response = await self.context.request.get(export_url, timeout=60000)
+            return response, await response.body()
+
+        try:
+            async with span("download", path="http", url=export_url) as timing:
+                response, body = await self._request("download", fetch)
+                timing.set(status=response.status, bytes=len(body))
+        except Exception as e:
+            print(f"HTTP export fetch failed: {e}")
+            return None
+
+        if not response.ok or looks_like_challenge(body):
+            print(f"HTTP export fetch got a challenge or error page (status {response.status}).")
+            # Not retried or reported to the scheduler here: its pause would also hold up the
+            # browser fallback, which is what earns a fresh clearance (and reports any challenge it sees)
+            self._http_blocked = True
+            return None
+
+        return await asyncio.to_thread(read_rankings_file, body)
+
+    async def download_journal_rankings(self, year, id_value, type_str):
+        """
+        Downloads the journal ranking Excel file.
+        Tries the HTTP fast path first, then the rendered page and its download button.
+        """
+        if type_str not in ['area', 'category']:
+            raise ValueError("type_str must be 'area' or 'category'")
+
+        page_url = f"{self.base_url}/journalrank.php?{type_str}={id_value}&year={year}"
+
+        if self.http_fast_path and not self._http_blocked:
+            print(f"Fetching rankings export: {page_url}&out=xls")
+            try:
+                df = await self._fetch_export_http(f"{page_url}&out=xls")
+            except Exception as e:
+                print(f"Error parsing HTTP export: {e}")
+                df = None
+            if df is not None:
+                return df
+            print("Falling back to the browser download...")
+
+        print(f"Navigating to rankings: {page_url}")
+
+        page = await self._acquire_page()
         try:
-            page.goto(page_url, timeout=60000)
-            handle_interstitials(page)
-            
+            await self._goto(page, page_url)
+            await self._wait_clear(page)
+
             # Wait for download button
             try:
                 download_selector = 'a.button[href*="out=xls"]'
-                print("Waiting up to 5 minutes for download button (solve CAPTCHA now if needed)...")
-                page.wait_for_selector(download_selector, state="visible", timeout=300000)
-            except:
+                if self.headless:
+                    # Challenges were already escalated by _wait_clear; nobody can solve one here
+                    button_timeout = 60000
+                    print("Waiting for download button...")
+                else:
+                    button_timeout = 300000
+                    print("Waiting up to 5 minutes for download button (solve CAPTCHA now if needed)...")
+                async with span("wait_for_selector", selector=download_selector):
+                    await page.wait_for_selector(download_selector, state="visible", timeout=button_timeout)
+            except Exception:
                 print("Download button not found (timeout).")
-                page.screenshot(path=f"debug_ranking_fail_{datetime.now().strftime('%Y%m%d%H%M%S')}.png")
+                if self.scheduler is not None:
+                    self.scheduler.record_timeout()
+                await page.screenshot(path=f"debug_ranking_fail_{datetime.now().strftime('%Y%m%d%H%M%S')}.png")
                 return None
 
+            # The page rendered, so the context now holds a valid clearance for HTTP fetches
+            self._http_blocked = False
+
             # Click and wait for download
-            with page.expect_download(timeout=60000) as download_info:
-                try:
-                    print("Clicking download button...")
-                    page.click(download_selector)
-                except Exception as e:
-                    print(f"Error clicking download button: {e}")
-                    raise e
-            
-            download = download_info.value
-            import tempfile
-            tmp_path = os.path.join(tempfile.gettempdir(), f"temp_sjr_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx")
-            download.save_as(tmp_path)
-            print(f"File downloaded to {tmp_path}")
-            
-            # Read into DataFrame
-            try:
-                # Try Excel 
-                df = pd.read_excel(tmp_path, engine='openpyxl')
-            except Exception as excel_err:
-                print(f"Excel read failed, trying CSV...")
-                try:
-                    df = pd.read_csv(tmp_path, sep=';', quotechar='"', on_bad_lines='skip')
-                except Exception as csv_err:
-                     print(f"CSV read failed: {csv_err}")
-                     raise excel_err
-            
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-            
-            return df
-            
+            async def click_and_download():
+                async with page.expect_download(timeout=60000) as download_info:
+                    try:
+                        print("Clicking download button...")
+                        await page.click(download_selector)
+                    except Exception as e:
+                        print(f"Error clicking download button: {e}")
+                        raise e
+
+                download = await download_info.value
+                # Parse Playwright's own copy of the download in memory; it is removed with the context
+                return await download.path()
+
+            async with span("download", path="browser", url=page_url):
+                download_path = await self._request("download", click_and_download)
+            print(f"File downloaded to {download_path}")
+            return await asyncio.to_thread(read_rankings_file, download_path)
+
         except Exception as e:
             print(f"Error downloading ranking data: {e}")
             return None
         finally:
-            browser.close()
+            await self._release_page(page)
+
+class SJRScraper:
+    """
+    Blocking facade over AsyncSJRScraper.
+    Runs the async session on a private event loop thread, so one browser stays
+    alive across searches, metric lookups and ranking downloads, and the session
+    can be shared between threads. The browser is launched on first use.
+    Extra keyword options are passed to AsyncSJRScraper.
+    Use as a context manager, or call close() when done.
+    """
+    def __init__(self, headless=True, **options):
+        self.headless = headless
+        self.async_scraper = AsyncSJRScraper(headless=headless, **options)
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        """
+        Runs a coroutine on the session's event loop and blocks for its result.
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def start(self):
+        self.run(self.async_scraper.start())
+
+    def prewarm(self):
+        """
+        Starts launching the browser in the background and returns immediately,
+        so a later operation finds it running.
+        """
+        return asyncio.run_coroutine_threadsafe(self.async_scraper.prewarm(), self._ensure_loop())
+
+    def close(self):
+        """
+        Closes the browser and stops the session's event loop.
+        """
+        if self._loop is None:
+            return
+        try:
+            self.run(self.async_scraper.close())
+        finally:
+            with self._lock:
+                loop, thread = self._loop, self._thread
+                self._loop = None
+                self._thread = None
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def search_journal(self, query, local=True):
+        return self.run(self.async_scraper.search_journal(query, local=local))
+
+    def get_journal_metrics(self, url_suffix, refresh=False):
+        return self.run(self.async_scraper.get_journal_metrics(url_suffix, refresh=refresh))
+
+    def list_ranking_tables(self, year):
+        return self.run(self.async_scraper.list_ranking_tables(year))
+
+    def download_journal_rankings(self, year, id_value, type_str):
+        return self.run(self.async_scraper.download_journal_rankings(year, id_value, type_str))
+
+async def search_journal_async(query):
+    async with AsyncSJRScraper() as scraper:
+        return await scraper.search_journal(query)
+
+async def get_journal_metrics_async(url_suffix, refresh=False):
+    async with AsyncSJRScraper() as scraper:
+        return await scraper.get_journal_metrics(url_suffix, refresh=refresh)
+
+async def download_journal_rankings_async(year, id_value, type_str):
+    async with AsyncSJRScraper() as scraper:
+        return await scraper.download_journal_rankings(year, id_value, type_str)
+
+def search_journal(query):
+    """
+    Searches for a journal on Scimago and returns a list of results.
+    Returns a list of dicts: {'title': str, 'url': str}
+    """
+    return asyncio.run(search_journal_async(query))
+
+def get_journal_metrics(url_suffix, refresh=False):
+    """
+    Navigates to the journal detail page and extracts metrics.
+    """
+    return asyncio.run(get_journal_metrics_async(url_suffix, refresh=refresh))
+
+def download_journal_rankings(year, id_value, type_str):
+    """
+    Downloads the journal ranking Excel file.
+    """
+    return asyncio.run(download_journal_rankings_async(year, id_value, type_str))
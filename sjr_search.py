@@ -0,0 +1,218 @@
+import re
+import bisect
+import threading
+from collections import Counter
+import pandas as pd
+from sjr_index import clean_issn, normalize_title
+from sjr_cache import get_default_cache
+from sjr_export import issn_series, ISSN_COLUMNS
+
+def journal_url(sid):
+    return f"journalsearch.php?q={sid}&tip=sid&clean=0"
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class JournalSearchIndex:
+    """
+    In-memory journal search over the titles and ISSNs found in local ranking tables.
+    Supports exact ISSN, title prefix and fuzzy (trigram) title matching, and returns
+    results in the same {'title', 'url'} shape as search_journal.
+    """
+    def __init__(self):
+        self.titles = {}
+        self.issn_to_sid = {}
+        self.title_to_sid = {}
+        self.trigram_to_sids = {}
+        self._sorted_titles = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add_table(self, df):
+        """
+        Adds the journals of one ranking table (needs Sourceid and Title columns).
+        """
+        if df is None or 'Sourceid' not in df.columns or 'Title' not in df.columns:
+            return
+        cols = [c for c in ('Sourceid', 'Title', 'Issn', *ISSN_COLUMNS) if c in df.columns]
+        rows = df[cols].dropna(subset=['Sourceid', 'Title']).drop_duplicates('Sourceid')
+        sid_values = (pd.to_numeric(rows['Sourceid'], errors='coerce').astype("Int64").astype("string")
+                      .to_numpy(dtype=object, na_value=None))
+        # Most tables repeat journals already indexed from other categories; skip those early
+        with self._lock:
+            new = [sid is not None and sid not in self.titles for sid in sid_values]
+        if not any(new):
+            return
+        rows, sid_values = rows[new], sid_values[new]
+        titles = rows['Title'].astype("string").str.strip()
+        # issn_series is indexed by row position, so its ISSNs pair up with sid_values directly
+        issns = issn_series(rows)
+
+        with self._lock:
+            for sid, title in zip(sid_values, titles):
+                if pd.isna(title) or not title or sid in self.titles:
+                    continue
+                norm = normalize_title(title)
+                for gram in _trigrams(norm):
+                    self.trigram_to_sids.setdefault(gram, set()).add(sid)
+                self._dirty = True
+                self.titles[sid] = title
+                self.title_to_sid.setdefault(norm, sid)
+            for pos, issn in zip(issns.index, issns.to_numpy(dtype=object)):
+                self.issn_to_sid.setdefault(issn, sid_values[pos])
+
+    def _result(self, sid):
+        return {"title": self.titles[sid], "url": journal_url(sid)}
+
+    def _sorted(self):
+        if self._dirty:
+            self._sorted_titles = sorted((normalize_title(t), sid) for sid, t in self.titles.items())
+            self._dirty = False
+        return self._sorted_titles
+
+    def prefix(self, text, limit=10):
+        """
+        Titles starting with text (case-insensitive), alphabetically.
+        """
+        norm = normalize_title(text)
+        with self._lock:
+            entries = self._sorted()
+            start = bisect.bisect_left(entries, (norm, ""))
+            out = []
+            for title, sid in entries[start:]:
+                if not title.startswith(norm) or len(out) >= limit:
+                    break
+                out.append(self._result(sid))
+            return out
+
+    def fuzzy(self, text, limit=10):
+        """
+        Titles ranked by trigram (Dice) similarity to text.
+        Returns a list of (score, result) pairs, best first.
+        """
+        norm = normalize_title(text)
+        grams = _trigrams(norm)
+        with self._lock:
+            counts = Counter()
+            for gram in grams:
+                counts.update(self.trigram_to_sids.get(gram, ()))
+            scored = []
+            for sid, common in counts.most_common(limit * 5):
+                other = len(_trigrams(normalize_title(self.titles[sid])))
+                scored.append((2 * common / (len(grams) + other), sid))
+            scored.sort(key=lambda x: -x[0])
+            return [(score, self._result(sid)) for score, sid in scored[:limit]]
+
+    def search(self, query, limit=10):
+        """
+        Searches the index. Returns (results, confident): confident is True only for an
+        exact ISSN or title hit. Fuzzy matches are returned but never confident, since
+        near-identical titles (e.g. "Physical Review A" and "B") score alike.
+        """
+        query = str(query).strip()
+        issn = clean_issn(query)
+        if re.fullmatch(r"\d{7}[\dXx]", issn):
+            with self._lock:
+                sid = self.issn_to_sid.get(issn.upper())
+                if sid is not None:
+                    return [self._result(sid)], True
+            return [], False
+
+        with self._lock:
+            sid = self.title_to_sid.get(normalize_title(query))
+            exact = self._result(sid) if sid is not None else None
+
+        fuzzy = self.fuzzy(query, limit)
+        results = [r for _, r in fuzzy]
+        if exact is not None:
+            results = [exact] + [r for r in results if r['url'] != exact['url']]
+            return results[:limit], True
+        return results, False
+
+    def suggest(self, text, limit=10):
+        """
+        Autocomplete: prefix matches first, then fuzzy matches.
+        """
+        results = self.prefix(text, limit)
+        if len(results) < limit:
+            seen = {r['url'] for r in results}
+            results += [r for _, r in self.fuzzy(text, limit) if r['url'] not in seen]
+        return results[:limit]
+
+def build_local_index(index=None):
+    """
+    Builds a JournalSearchIndex (or fills the given one) from every cached and
+    snapshotted ranking table.
+    """
+    # Imported here: sjr_store depends on sjr_scraper, which uses this module
+    from sjr_store import open_default_store
+
+    index = index if index is not None else JournalSearchIndex()
+    columns = ['Sourceid', 'Title', 'Issn', *ISSN_COLUMNS]
+    for df in get_default_cache().iter_tables(columns):
+        index.add_table(df)
+    store = open_default_store()
+    if store is not None:
+        for df in store.iter_tables(columns):
+            index.add_table(df)
+    return index
+
+_default_index = None
+_building_index = None
+_default_index_ready = threading.Event()
+_default_index_lock = threading.Lock()
+
+def _claim_default_build():
+    # Returns a fresh index for the caller to build, or None if one is built or being built
+    global _building_index
+    with _default_index_lock:
+        if _default_index is not None or _building_index is not None:
+            return None
+        _building_index = JournalSearchIndex()
+        return _building_index
+
+def _build_default_index(index):
+    global _default_index, _building_index
+    try:
+        build_local_index(index)
+    except Exception as e:
+        print(f"Error building the local search index: {e}")
+    with _default_index_lock:
+        _default_index = index
+        _building_index = None
+    _default_index_ready.set()
+
+def add_to_default_index(df):
+    """
+    Adds a newly loaded ranking table to the shared index, if it is built or being built.
+    """
+    index = _default_index if _default_index is not None else _building_index
+    if index is not None:
+        index.add_table(df)
+
+def start_default_search_index():
+    """
+    Starts building the shared index in a background thread, unless it is built or
+    already being built.
+    """
+    index = _claim_default_build()
+    if index is not None:
+        threading.Thread(target=_build_default_index, args=(index,), daemon=True).start()
+
+def get_default_search_index(wait=True):
+    """
+    Returns the shared process-wide search index, building it on first use.
+    With wait=False the build runs in the background and None is returned until it is ready.
+    """
+    if not wait:
+        start_default_search_index()
+        return _default_index
+    index = _claim_default_build()
+    if index is not None:
+        _build_default_index(index)
+    _default_index_ready.wait()
+    return _default_index
@@ -0,0 +1,325 @@
+import os
+import io
+import time
+import sqlite3
+import asyncio
+import threading
+import pandas as pd
+from sjr_cache import DEFAULT_CACHE_DIR, to_parquet_frame, read_parquet_columns
+from sjr_scraper import SJRScraper, AsyncSJRScraper
+from sjr_index import prepare_ranking_table, normalize_title, clean_issn
+from sjr_export import issn_series
+
+DEFAULT_STORE_PATH = os.path.join(DEFAULT_CACHE_DIR, "snapshots.db")
+
+class RankingStore:
+    """
+    Local SQLite database holding full-year snapshots of Scimago ranking tables.
+    Each table is stored once as a compressed Parquet blob keyed by (year, type, id).
+    The sync plan for a year is kept alongside, so an interrupted sync resumes
+    where it stopped. A journal key table maps every ISSN, source id and normalized
+    title to the (table, row) listing it, so a journal is found without reading tables.
+    """
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_STORE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS rankings (
+                    year TEXT, type TEXT, id TEXT, name TEXT,
+                    fetched_at REAL, data BLOB,
+                    PRIMARY KEY (year, type, id)
+                );
+                CREATE TABLE IF NOT EXISTS sync_plan (
+                    year TEXT, type TEXT, id TEXT, name TEXT,
+                    status TEXT DEFAULT 'pending', attempts INTEGER DEFAULT 0,
+                    PRIMARY KEY (year, type, id)
+                );
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    year TEXT PRIMARY KEY, planned_at REAL, completed_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS journal_keys (
+                    year TEXT, key TEXT, type TEXT, id TEXT, row INTEGER,
+                    PRIMARY KEY (year, key, type, id)
+                );
+                CREATE INDEX IF NOT EXISTS journal_keys_by_table ON journal_keys (year, type, id);
+            """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def put(self, year, type_str, id_value, df, name=None):
+        buf = io.BytesIO()
+        to_parquet_frame(df).to_parquet(buf, index=False, compression="zstd")
+        keys = journal_keys(df)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rankings VALUES (?, ?, ?, ?, ?, ?)",
+                (str(year), type_str, str(id_value), name, time.time(), buf.getvalue())
+            )
+            self._put_keys(year, type_str, id_value, keys)
+            self._conn.execute(
+                "UPDATE sync_plan SET status = 'done' WHERE year = ? AND type = ? AND id = ?",
+                (str(year), type_str, str(id_value))
+            )
+
+    def get(self, year, type_str, id_value):
+        """
+        Returns the stored DataFrame, or None if the table is not in the store.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM rankings WHERE year = ? AND type = ? AND id = ?",
+                (str(year), type_str, str(id_value))
+            ).fetchone()
+        if row is None:
+            return None
+        return pd.read_parquet(io.BytesIO(row[0]))
+
+    def _put_keys(self, year, type_str, id_value, keys):
+        # Caller holds the lock and the transaction
+        table = (str(year), type_str, str(id_value))
+        self._conn.execute("DELETE FROM journal_keys WHERE year = ? AND type = ? AND id = ?", table)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO journal_keys VALUES (?, ?, ?, ?, ?)",
+            ((table[0], key, table[1], table[2], row) for key, row in keys)
+        )
+
+    def _ensure_keys(self, year):
+        """
+        Builds the journal keys of a year stored before the key table existed.
+        """
+        with self._lock:
+            indexed = self._conn.execute("SELECT 1 FROM journal_keys WHERE year = ? LIMIT 1",
+                                         (str(year),)).fetchone()
+            tables = self._conn.execute("SELECT type, id FROM rankings WHERE year = ?", (str(year),)).fetchall()
+        if indexed is not None or not tables:
+            return
+        print(f"Indexing the journals of the {year} snapshot (one-off)...")
+        for type_str, id_value in tables:
+            df = self.get(year, type_str, id_value)
+            keys = journal_keys(df)
+            with self._lock, self._conn:
+                self._put_keys(year, type_str, id_value, keys)
+
+    def find_journal(self, year, issns=(), title=None, sid=None):
+        """
+        Returns {(type, id): row} for every stored table of the year that lists the journal.
+        Within a table an ISSN match wins over a source id match, which wins over an
+        exact (case-insensitive) title match, as in RankingIndex.find.
+        """
+        self._ensure_keys(year)
+        keys = [_issn_key(i) for i in issns]
+        if sid is not None:
+            keys.append(f"sid:{sid}")
+        if title:
+            keys.append(f"title:{normalize_title(title)}")
+        if not keys:
+            return {}
+        priority = {key: (0 if key.startswith("issn:") else 1 if key.startswith("sid:") else 2) for key in keys}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, type, id, row FROM journal_keys WHERE year = ? AND key IN ({','.join('?' * len(keys))})",
+                (str(year), *keys)
+            ).fetchall()
+        best = {}
+        for key, type_str, id_value, row in rows:
+            rank = (priority[key], row)
+            table = (type_str, id_value)
+            if table not in best or rank < best[table]:
+                best[table] = rank
+        return {table: rank[1] for table, rank in best.items()}
+
+    def tables(self, year):
+        """
+        Lists the stored tables for a year as {'name', 'type', 'id'} dicts.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT type, id, name FROM rankings WHERE year = ? ORDER BY type, id", (str(year),)
+            ).fetchall()
+        return [{"name": name, "type": "Subject Area" if t == 'area' else "Category", "id": i}
+                for t, i, name in rows]
+
+    def iter_tables(self, columns=None):
+        """
+        Yields every stored table of every year, reading only the given columns.
+        """
+        with self._lock:
+            keys = self._conn.execute("SELECT year, type, id FROM rankings").fetchall()
+        for key in keys:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM rankings WHERE year = ? AND type = ? AND id = ?", key
+                ).fetchone()
+            if row is not None:
+                yield read_parquet_columns(io.BytesIO(row[0]), columns)
+
+    # --- sync plan / checkpointing ---
+
+    def has_plan(self, year):
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM snapshots WHERE year = ?", (str(year),)).fetchone()
+        return row is not None
+
+    def set_plan(self, year, entries):
+        """
+        Records the list of tables a sync for this year must fetch.
+        Tables already in the store are marked done.
+        """
+        with self._lock, self._conn:
+            for e in entries:
+                type_str = 'area' if e['type'] == 'Subject Area' else 'category'
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO sync_plan (year, type, id, name) VALUES (?, ?, ?, ?)",
+                    (str(year), type_str, str(e['id']), e['name'])
+                )
+            self._conn.execute(
+                "UPDATE sync_plan SET status = 'done' WHERE year = ? AND EXISTS ("
+                "SELECT 1 FROM rankings r WHERE r.year = sync_plan.year AND r.type = sync_plan.type "
+                "AND r.id = sync_plan.id)", (str(year),)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (year, planned_at, completed_at) VALUES (?, ?, NULL)",
+                (str(year), time.time())
+            )
+
+    def pending(self, year, include_failed=True):
+        statuses = ('pending', 'failed') if include_failed else ('pending',)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT type, id, name FROM sync_plan WHERE year = ? AND status IN ({','.join('?' * len(statuses))})",
+                (str(year), *statuses)
+            ).fetchall()
+        return rows
+
+    def mark_failed(self, year, type_str, id_value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE sync_plan SET status = 'failed', attempts = attempts + 1 "
+                "WHERE year = ? AND type = ? AND id = ?",
+                (str(year), type_str, str(id_value))
+            )
+
+    def mark_complete(self, year):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE snapshots SET completed_at = ? WHERE year = ?", (time.time(), str(year)))
+
+    def is_complete(self, year):
+        with self._lock:
+            row = self._conn.execute("SELECT completed_at FROM snapshots WHERE year = ?", (str(year),)).fetchone()
+        return row is not None and row[0] is not None
+
+def _issn_key(issn):
+    return f"issn:{clean_issn(issn).upper()}"
+
+def journal_keys(df):
+    """
+    Returns [(key, row)] for a ranking table: every ISSN, source id and normalized
+    title, each mapped to the position of the first row carrying it.
+    """
+    keys = {}
+    issns = issn_series(df)
+    for issn, pos in zip(issns.to_numpy(), issns.index):
+        keys.setdefault(_issn_key(issn), int(pos))
+    if 'Sourceid' in df.columns:
+        sids = pd.to_numeric(df['Sourceid'], errors='coerce').astype("Int64").astype("string")
+        for pos, sid in enumerate(sids.to_numpy(dtype=object, na_value=None)):
+            if sid is not None:
+                keys.setdefault(f"sid:{sid}", pos)
+    if 'Title' in df.columns:
+        titles = df['Title'].astype("string").str.lower().str.strip()
+        for pos, title in enumerate(titles.to_numpy(dtype=object, na_value=None)):
+            if title:
+                keys.setdefault(f"title:{title}", pos)
+    return list(keys.items())
+
+_default_store = None
+
+def open_default_store():
+    """
+    Returns the default RankingStore, or None if no snapshot has ever been synced.
+    """
+    global _default_store
+    if _default_store is None:
+        if not os.path.exists(DEFAULT_STORE_PATH):
+            return None
+        _default_store = RankingStore()
+    return _default_store
+
+async def sync_year_async(year, store=None, scraper=None, concurrency=4, retry_failed=True):
+    """
+    Mirrors every subject area and category ranking table of a year into the store.
+    The table list is enumerated once and checkpointed; tables already stored are
+    skipped, so rerunning after an interruption only fetches what is missing.
+    """
+    store = store or RankingStore()
+    if scraper is None:
+        async with AsyncSJRScraper(max_pages=max(concurrency, 1)) as own_scraper:
+            return await sync_year_async(year, store, scraper=own_scraper, concurrency=concurrency,
+                                         retry_failed=retry_failed)
+
+    if not store.has_plan(year):
+        entries = await scraper.list_ranking_tables(year)
+        if not entries:
+            # Nothing is stored, so the next run enumerates again
+            print("Could not enumerate ranking tables; run the sync again to retry.")
+            return False
+        store.set_plan(year, entries)
+
+    todo = store.pending(year, include_failed=retry_failed)
+    print(f"{len(todo)} ranking tables left to fetch for {year}.")
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    done = 0
+
+    async def fetch(type_str, id_value, name):
+        nonlocal done
+        async with slots:
+            try:
+                df = await scraper.download_journal_rankings(year, id_value, type_str)
+            except Exception as e:
+                print(f"Error downloading {name}: {e}")
+                df = None
+            if df is None:
+                await asyncio.to_thread(store.mark_failed, year, type_str, id_value)
+                return
+            df = prepare_ranking_table(df)
+            await asyncio.to_thread(store.put, year, type_str, id_value, df, name)
+            done += 1
+            print(f"[{done}/{len(todo)}] Stored {name}")
+
+    await asyncio.gather(*(fetch(*row) for row in todo))
+
+    remaining = store.pending(year)
+    if remaining:
+        print(f"{len(remaining)} tables failed; run the sync again to retry them.")
+        return False
+    store.mark_complete(year)
+    print(f"Snapshot for {year} is complete.")
+    return True
+
+def sync_year(year, store=None, concurrency=4, retry_failed=True, scraper_options=None):
+    """
+    Blocking wrapper over sync_year_async.
+    """
+    with SJRScraper(max_pages=max(concurrency, 1), **(scraper_options or {})) as scraper:
+        return scraper.run(sync_year_async(year, store, scraper=scraper.async_scraper,
+                                           concurrency=concurrency, retry_failed=retry_failed))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Mirror a full Scimago ranking year into a local snapshot')
+    parser.add_argument('year', help='Year to sync')
+    parser.add_argument('--db', default=None, help=f'Snapshot database path (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of tables to download in parallel')
+    parser.add_argument('--skip-failed', action='store_true', help='Do not retry tables that failed in an earlier run')
+    parser.add_argument('--block-resources', action='store_true', help='Skip images, fonts, media and ad/analytics requests')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window instead of running headless')
+
+    args = parser.parse_args()
+
+    sync_year(args.year, RankingStore(args.db), concurrency=args.concurrency, retry_failed=not args.skip_failed,
+              scraper_options={"block_resources": args.block_resources, "headless": not args.headed})
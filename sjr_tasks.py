@@ -0,0 +1,110 @@
+import asyncio
+import itertools
+import threading
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class Task:
+    """
+    One job submitted to a TaskQueue. status moves from queued to running to
+    done, failed or cancelled; result or error is set when it finishes.
+    """
+    def __init__(self, task_id, name):
+        self.id = task_id
+        self.name = name
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self._future = None
+        self._started = False
+        self._cancel_requested = False
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def cancel(self):
+        """
+        Cancels the job whether it is still queued or already running.
+        """
+        self._cancel_requested = True
+        if self._future is not None:
+            self._future.cancel()
+
+class TaskQueue:
+    """
+    Background job scheduler for an SJRScraper session.
+    Jobs are coroutines run on the scraper's event loop; at most max_workers run
+    at once and the rest wait in submission order. on_update(task) is called
+    from the loop thread whenever a task changes status, so GUI callers must
+    hand it over to their own thread (e.g. with Tk's after()).
+    """
+    def __init__(self, scraper, max_workers=2, on_update=None):
+        self.scraper = scraper
+        self.max_workers = max_workers
+        self.on_update = on_update
+        self.tasks = []
+        self._ids = itertools.count(1)
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _notify(self, task):
+        if self.on_update is not None:
+            try:
+                self.on_update(task)
+            except Exception as e:
+                print(f"Error in task update callback: {e}")
+
+    async def _run(self, task, make_coro):
+        task._started = True
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        try:
+            async with self._slots:
+                task.status = RUNNING
+                self._notify(task)
+                task.result = await make_coro()
+                task.status = DONE
+        except asyncio.CancelledError:
+            task.status = CANCELLED
+            raise
+        except Exception as e:
+            task.error = e
+            task.status = FAILED
+        finally:
+            self._notify(task)
+        return task.result
+
+    def submit(self, name, make_coro):
+        """
+        Queues a job. make_coro is called with no arguments when a worker slot frees
+        up and must return the coroutine to run. Returns the Task.
+        """
+        task = Task(next(self._ids), name)
+        with self._lock:
+            self.tasks.append(task)
+        self._notify(task)
+        future = asyncio.run_coroutine_threadsafe(self._run(task, make_coro), self.scraper._ensure_loop())
+        task._future = future
+        future.add_done_callback(lambda f: self._cancelled_before_start(task, f))
+        if task._cancel_requested:
+            future.cancel()
+        return task
+
+    def _cancelled_before_start(self, task, future):
+        # A job cancelled before its coroutine ran never reaches _run's handlers
+        if future.cancelled() and not task._started and task.status != CANCELLED:
+            task.status = CANCELLED
+            self._notify(task)
+
+    def active(self):
+        with self._lock:
+            return [t for t in self.tasks if not t.finished]
+
+    def cancel_all(self):
+        for task in self.active():
+            task.cancel()
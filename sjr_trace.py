@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import threading
+
+class _NoopSpan:
+    """
+    Returned by a disabled Tracer: entering and leaving it does nothing.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """
+    One timed stage. Usable with both `with` and `async with`; set() adds attributes.
+    """
+    __slots__ = ("tracer", "name", "attrs", "lane", "start", "duration")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.lane = None
+        self.start = None
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.lane = self.tracer._lane()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._record(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+class Tracer:
+    """
+    Collects timing spans around scraper stages (browser launch, navigation,
+    interstitials, selector waits, downloads, parsing).
+    When disabled, span() returns a shared no-op object, so instrumented code
+    costs one attribute check. Spans can be exported as JSON lines or as a
+    Chrome trace (chrome://tracing, Perfetto), and summarized per stage.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._lanes = {}
+
+    def enable(self):
+        self.enabled = True
+        return self
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+            self._lanes = {}
+        self._origin = time.perf_counter()
+
+    def span(self, name, /, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _lane(self):
+        # Concurrent asyncio tasks get their own lane, so their spans do not interleave in the trace.
+        # asyncio is looked up rather than imported, to keep this module cheap to import.
+        asyncio = sys.modules.get("asyncio")
+        try:
+            key = id(asyncio.current_task()) if asyncio is not None else threading.get_ident()
+        except RuntimeError:
+            key = threading.get_ident()
+        with self._lock:
+            return self._lanes.setdefault(key, len(self._lanes) + 1)
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def _events(self):
+        with self._lock:
+            spans = list(self.spans)
+        return [{
+            "name": s.name,
+            "start": round(s.start - self._origin, 6),
+            "duration": round(s.duration, 6),
+            "lane": s.lane,
+            **({"attrs": s.attrs} if s.attrs else {}),
+        } for s in spans]
+
+    def export_jsonl(self, path):
+        """
+        Writes one JSON object per span: name, start and duration (seconds), lane, attrs.
+        """
+        with open(path, "w") as f:
+            for event in self._events():
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def export_chrome_trace(self, path):
+        """
+        Writes the spans in the Chrome trace event format.
+        """
+        pid = os.getpid()
+        events = [{
+            "name": e["name"], "ph": "X", "pid": pid, "tid": e["lane"],
+            "ts": round(e["start"] * 1e6), "dur": round(e["duration"] * 1e6),
+            "args": e.get("attrs", {}),
+        } for e in self._events()]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+    def export(self, path):
+        """
+        Exports to path as JSON lines if it ends in .jsonl, otherwise as a Chrome trace.
+        """
+        if path.endswith(".jsonl"):
+            self.export_jsonl(path)
+        else:
+            self.export_chrome_trace(path)
+
+    def summary(self):
+        """
+        Per-stage aggregates: {name: {'count', 'total', 'mean', 'max'}} in seconds, slowest total first.
+        """
+        stages = {}
+        with self._lock:
+            for s in self.spans:
+                stages.setdefault(s.name, []).append(s.duration)
+        rows = {name: {"count": len(d), "total": sum(d), "mean": sum(d) / len(d), "max": max(d)}
+                for name, d in stages.items()}
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["total"]))
+
+    def print_summary(self):
+        rows = self.summary()
+        if not rows:
+            return
+        width = max(len(name) for name in rows)
+        print(f"\n{'Stage':<{width}}  {'Count':>6}  {'Total s':>9}  {'Mean s':>8}  {'Max s':>8}")
+        for name, r in rows.items():
+            print(f"{name:<{width}}  {r['count']:>6}  {r['total']:>9.3f}  {r['mean']:>8.3f}  {r['max']:>8.3f}")
+
+# Reference point for startup milestones: this module is among the first the entry points import
+_origin = time.perf_counter()
+_milestones = {}
+
+def mark(name):
+    """
+    Records a startup milestone (seconds since this module was imported) the first
+    time it is reached, and returns the elapsed time.
+    """
+    elapsed = time.perf_counter() - _origin
+    _milestones.setdefault(name, elapsed)
+    return elapsed
+
+def milestones():
+    """
+    Returns {name: seconds since startup} for every milestone reached so far.
+    """
+    return dict(_milestones)
+
+def print_milestones():
+    if _milestones:
+        print("\nStartup: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in _milestones.items()))
+
+# Shared tracer used by the scraper and analytics; disabled unless SJR_TRACE is set or enable() is called
+_tracer = Tracer(enabled=bool(os.environ.get("SJR_TRACE")))
+
+def get_tracer():
+    return _tracer
+
+def span(name, /, **attrs):
+    """
+    Starts a span on the shared tracer (a no-op when tracing is off).
+    """
+    return _tracer.span(name, **attrs) if _tracer.enabled else NOOP_SPAN